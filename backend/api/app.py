@@ -1,12 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, abort, g, make_response, stream_with_context
 from flask_cors import CORS
-from flask_mail import Mail, Message
 import os
+import time
 from dotenv import load_dotenv
+from candidate_registry import create_candidate_registry
+from pdf_extraction import BLOCKS_VERSION, iter_blocks, iter_pages
 from resume_parser import ResumeParser
-from chat_handler import ChatHandler
+from chat_handler import BUSY_MESSAGE, ERROR_MESSAGE
+from experience_parser import parse_experience, parse_experience_blocks
+from http_cache import CachedPayload, cached_json_response
+from lazy_resource import LazyResource, warm_up
+from llm_scheduler import LLMOverloaded
+from mail_queue import create_mail_dispatcher, is_valid_address, spool_path
+import metrics
+from session_store import SessionStore
+import skill_matcher
 import spacy
-import re
+import json
 
 load_dotenv()
 
@@ -21,54 +31,187 @@ app.config['MAIL_USERNAME'] = os.getenv('EMAIL_USER')
 app.config['MAIL_PASSWORD'] = os.getenv('EMAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.getenv('EMAIL_USER')
 
-mail = Mail(app)
+# Contact emails are sent on the first submission, or spooled for a background worker if MAIL_SPOOL_PATH is set
+mail_dispatcher_resource = LazyResource('mail_dispatcher', lambda: create_mail_dispatcher(app.config))
 
-# Load spaCy model for NLP
-nlp = spacy.load("en_core_web_sm")
+# Default skill extraction mode: 'full' adds spaCy noun extraction, 'fast' only matches the skill vocabulary
+SKILL_EXTRACTION_MODE = os.getenv('SKILL_EXTRACTION_MODE', 'full')
 
-# Initialize resume parser and chat handler
-resume_parser = ResumeParser('venkata-aduri.pdf')
-chat_handler = ChatHandler(resume_parser)
+# Batching for multi-document skill extraction
+SKILL_BATCH_SIZE = max(1, int(os.getenv('SKILL_BATCH_SIZE', 64)))
+# Worker processes are capped at the number of cores on this machine
+SKILL_N_PROCESS = max(1, min(int(os.getenv('SKILL_N_PROCESS', 1)), os.cpu_count() or 1))
+SKILL_BATCH_MAX_TEXTS = int(os.getenv('SKILL_BATCH_MAX_TEXTS', 1000))
 
-def extract_skills_from_text(text):
-    """Extract skills from text using NLP and pattern matching."""
-    # Common technical skills patterns
-    technical_skills = [
-        r'\b(python|java|c\+\+|javascript|typescript|react|angular|vue|node\.js|express|django|flask|spring|ruby|php|swift|kotlin)\b',
-        r'\b(sql|mysql|postgresql|mongodb|redis|oracle|sqlite)\b',
-        r'\b(aws|azure|gcp|docker|kubernetes|terraform|ansible|jenkins|git|github|gitlab)\b',
-        r'\b(machine learning|deep learning|nlp|computer vision|data science|ai|artificial intelligence)\b',
-        r'\b(html|css|sass|less|bootstrap|tailwind|material-ui|jquery)\b',
-        r'\b(rest|graphql|api|microservices|soa|websocket|grpc)\b',
-        r'\b(linux|unix|windows|macos|ios|android)\b',
-        r'\b(agile|scrum|kanban|devops|ci/cd|tdd|bdd)\b'
+# Most job postings scored in one /api/fit-score request
+FIT_SCORE_MAX_POSTINGS = int(os.getenv('FIT_SCORE_MAX_POSTINGS', 10000))
+
+# Largest resume PDF accepted by /api/parse-resume
+RESUME_UPLOAD_MAX_BYTES = int(os.getenv('RESUME_UPLOAD_MAX_BYTES', 5 * 1024 * 1024))
+
+# How long clients and CDNs may reuse the read-only resume endpoints
+RESOURCE_CACHE_MAX_AGE = int(os.getenv('RESOURCE_CACHE_MAX_AGE', 300))
+
+def build_experience(candidate):
+    """Parse the resume's experience once, reusing the on-disk artifact cache when possible."""
+    resume_parser = candidate.resume_parser
+    def compute():
+        # Prefer the PDF's structure, falling back to text heuristics for layouts it doesn't cover
+        experience = parse_experience_blocks(resume_parser.blocks, extract_skills_from_texts)
+        if experience['professional_experience'] or experience['other_experience']:
+            return experience
+        return parse_experience(resume_parser.resume_text, extract_skills_from_texts)
+    if resume_parser.cache is None:
+        return compute()
+    depends_on = {
+        'mode': SKILL_EXTRACTION_MODE,
+        'vocabulary': skill_matcher.TECHNICAL_SKILLS + skill_matcher.SOFT_SKILLS,
+        'parser': ('blocks', BLOCKS_VERSION)
+    }
+    return resume_parser.cache.get_or_compute('experience', compute, depends_on)
+
+def build_skills(candidate):
+    """Collect the explicit and inferred skills from the chat handler."""
+    chat_handler = candidate.chat_handler
+    return {
+        'explicit_skills': chat_handler.extracted_skills,
+        # Skills reached through the skill graph, as used when answering questions
+        'inferred_skills': [
+            skill for skill, details in chat_handler.skill_database['skills'].items()
+            if details['source'] == 'inferred'
+        ]
+    }
+
+# The spaCy model and each candidate's resume parser and chat handler are
+# built on first use so that a cold start only pays for Python imports
+nlp_resource = LazyResource('nlp', lambda: spacy.load("en_core_web_sm", disable=skill_matcher.UNUSED_SPACY_COMPONENTS))
+
+# Candidates are loaded on demand and the least recently used ones are dropped.
+# Their read-only resume endpoints never change for the life of the candidate,
+# so the responses are serialized once and served with an ETag
+candidates = create_candidate_registry({
+    'experience': lambda candidate: CachedPayload(build_experience(candidate)),
+    'resume_info': lambda candidate: CachedPayload(candidate.resume_parser.get_resume_info()),
+    'skills': lambda candidate: CachedPayload(build_skills(candidate))
+})
+
+def collect_response_cache():
+    if candidates.response_cache is None:
+        return []
+    stats = candidates.response_cache.stats()
+    return [({'result': result}, stats[key]) for result, key in (('hit', 'hits'), ('near_hit', 'near_hits'), ('miss', 'misses'))]
+
+def collect_scheduler(counter):
+    return lambda: [({}, candidates.scheduler.stats()[counter])]
+
+def collect_sessions():
+    return [
+        ({'candidate': candidate.id}, len(candidate.chat_handler.sessions))
+        for candidate in candidates.loaded() if candidate.chat_handler_resource.ready
     ]
-    
-    # Common soft skills
-    soft_skills = [
-        r'\b(communication|teamwork|leadership|problem-solving|critical thinking|time management|adaptability|creativity)\b',
-        r'\b(collaboration|negotiation|presentation|public speaking|mentoring|coaching|project management)\b'
+
+def collect_prompt_prefix_tokens():
+    return [
+        ({'candidate': candidate.id}, candidate.chat_handler.prompt_prefix.tokens)
+        for candidate in candidates.loaded()
+        if candidate.chat_handler_resource.ready and candidate.chat_handler._prompt_prefix.ready
     ]
-    
-    # Combine all patterns
-    all_patterns = technical_skills + soft_skills
-    
-    # Extract skills using patterns
-    skills = set()
-    for pattern in all_patterns:
-        matches = re.finditer(pattern, text.lower())
-        for match in matches:
-            skills.add(match.group().capitalize())
-    
-    # Use spaCy for additional skill extraction
-    doc = nlp(text)
-    for token in doc:
-        if token.pos_ in ['NOUN', 'PROPN'] and token.text.lower() not in ['i', 'me', 'my', 'we', 'our']:
-            # Check if the word is likely a skill
-            if len(token.text) > 2 and not token.is_stop:
-                skills.add(token.text.capitalize())
-    
-    return sorted(list(skills))
+
+def collect_mail_outbox():
+    if not mail_dispatcher_resource.ready or mail_dispatcher_resource.get().spool is None:
+        return []
+    counts = mail_dispatcher_resource.get().spool.counts()
+    return [({'state': state}, count) for state, count in counts.items()]
+
+# Shared cache, scheduler and session state is read when /api/metrics is scraped
+metrics.REGISTRY.collected('response_cache_lookups_total', 'Response cache lookups by result', collect_response_cache, 'counter')
+metrics.REGISTRY.collected('llm_calls_total', 'Language model calls made, including retries', collect_scheduler('calls'), 'counter')
+metrics.REGISTRY.collected('llm_retries_total', 'Language model calls retried after a transient error', collect_scheduler('retries'), 'counter')
+metrics.REGISTRY.collected('llm_coalesced_total', 'Language model calls served by an identical in-flight call', collect_scheduler('coalesced'), 'counter')
+metrics.REGISTRY.collected('llm_overloaded_total', 'Language model calls given up because the provider was over capacity', collect_scheduler('overloaded'), 'counter')
+metrics.REGISTRY.collected('llm_active_calls', 'Language model calls in progress', collect_scheduler('active'))
+metrics.REGISTRY.collected('llm_queued_calls', 'Callers waiting for a language model slot', collect_scheduler('queued'))
+metrics.REGISTRY.collected('chat_sessions', 'Conversations held in memory, by candidate', collect_sessions)
+metrics.REGISTRY.collected('candidates_loaded', 'Candidates currently loaded', lambda: [({}, len(candidates))])
+metrics.REGISTRY.collected('chat_prompt_prefix_tokens', 'Tokens in the static prompt prefix shared by every question, by candidate', collect_prompt_prefix_tokens)
+metrics.REGISTRY.collected('mail_outbox', 'Contact emails in the spool, by state', collect_mail_outbox)
+
+def get_nlp():
+    return nlp_resource.get()
+
+def get_candidate(candidate_id=None):
+    """Return a candidate, or abort with 404 if there is no such candidate."""
+    try:
+        return candidates.get(candidate_id)
+    except KeyError:
+        abort(make_response(jsonify({'error': f'Unknown candidate: {candidate_id}'}), 404))
+
+def get_resume_parser(candidate_id=None):
+    return get_candidate(candidate_id).resume_parser
+
+def get_chat_handler(candidate_id=None):
+    return get_candidate(candidate_id).chat_handler
+
+def get_resource_status(candidate_id=None):
+    """Return the state of every lazily initialized resource."""
+    resources = [nlp_resource] + get_candidate(candidate_id).resources()
+    return {resource.name: resource.status() for resource in resources}
+
+def get_serving_resources(candidate_id=None):
+    """Return the resources a chat request can't be answered without."""
+    candidate = get_candidate(candidate_id)
+    resources = [candidate.resume_parser_resource, candidate.chat_handler_resource]
+    # Fast mode never loads spaCy, so it doesn't hold up readiness
+    if SKILL_EXTRACTION_MODE != 'fast':
+        resources.insert(0, nlp_resource)
+    return resources
+
+def extract_skills_from_text(text, fast=None):
+    """Extract skills from text using NLP and pattern matching."""
+    if fast is None:
+        fast = SKILL_EXTRACTION_MODE == 'fast'
+    # Fast mode skips spaCy entirely and only matches the skill vocabulary
+    return skill_matcher.extract_skills_from_text(text, None if fast else get_nlp())
+
+def extract_skills_from_texts(texts, fast=None, batch_size=None, n_process=None):
+    """Extract skills from many texts, batching them through spaCy."""
+    if fast is None:
+        fast = SKILL_EXTRACTION_MODE == 'fast'
+    return skill_matcher.extract_skills_from_texts(
+        texts,
+        None if fast else get_nlp(),
+        batch_size=batch_size or SKILL_BATCH_SIZE,
+        n_process=n_process or SKILL_N_PROCESS
+    )
+
+@app.before_first_request
+def resume_mail_delivery():
+    """Start the mail worker if an earlier run left messages in the spool."""
+    if spool_path() and os.path.exists(spool_path()):
+        mail_dispatcher_resource.get()
+
+@app.before_request
+def start_trace():
+    """Tag the request with the client's X-Request-Id, or a new trace id, and start its timer."""
+    g.request_started = time.perf_counter()
+    metrics.set_trace_id(request.headers.get('X-Request-Id'))
+
+@app.after_request
+def finish_trace(response):
+    response.headers['X-Request-Id'] = metrics.current_trace_id() or ''
+    if 'request_started' in g:
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - g.request_started,
+            route=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=str(response.status_code)
+        )
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose latency, token, cache and error metrics in the Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), mimetype=metrics.CONTENT_TYPE)
 
 @app.route('/api/extract-skills', methods=['POST'])
 def extract_skills():
@@ -80,7 +223,8 @@ def extract_skills():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        skills = extract_skills_from_text(text)
+        mode = data.get('mode', SKILL_EXTRACTION_MODE)
+        skills = extract_skills_from_text(text, fast=mode == 'fast')
         
         return jsonify({
             'skills': skills,
@@ -93,120 +237,233 @@ def extract_skills():
             'details': str(e)
         }), 500
 
+@app.route('/api/extract-skills/batch', methods=['POST'])
+def extract_skills_batch():
+    """Extract skills from a list of texts in one request."""
+    try:
+        data = request.json
+        texts = data.get('texts')
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'No texts provided'}), 400
+        if len(texts) > SKILL_BATCH_MAX_TEXTS:
+            return jsonify({'error': f'At most {SKILL_BATCH_MAX_TEXTS} texts are allowed per request'}), 400
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'Every text must be a string'}), 400
+        
+        mode = data.get('mode', SKILL_EXTRACTION_MODE)
+        results = extract_skills_from_texts(texts, fast=mode == 'fast')
+        
+        return jsonify({
+            'results': [{'skills': skills, 'count': len(skills)} for skills in results],
+            'count': len(results)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to extract skills',
+            'details': str(e)
+        }), 500
+
+@app.route('/api/fit-score', methods=['POST'])
+@app.route('/api/candidates/<candidate_id>/fit-score', methods=['POST'])
+def fit_score(candidate_id=None):
+    """Rank job postings by how well the candidate's skills cover the skills they ask for."""
+    candidate = get_candidate(candidate_id)
+    try:
+        data = request.json
+        postings = data.get('postings')
+        
+        if not isinstance(postings, list) or not postings:
+            return jsonify({'error': 'No postings provided'}), 400
+        if len(postings) > FIT_SCORE_MAX_POSTINGS:
+            return jsonify({'error': f'At most {FIT_SCORE_MAX_POSTINGS} postings are allowed per request'}), 400
+        # Postings are plain text or objects with a text field and any identifying fields
+        texts = [posting.get('text') if isinstance(posting, dict) else posting for posting in postings]
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'Every posting must be a string or an object with a text field'}), 400
+        
+        try:
+            top = int(data['top']) if data.get('top') is not None else None
+            min_score = float(data.get('min_score', 0))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'top and min_score must be numbers'}), 400
+        if top is not None and top < 0:
+            return jsonify({'error': 'top must not be negative'}), 400
+        
+        results = candidate.chat_handler.fit_scorer.rank(texts, top=top, min_score=min_score)
+        for result in results:
+            posting = postings[result['index']]
+            if isinstance(posting, dict):
+                result.update({key: value for key, value in posting.items() if key != 'text' and key not in result})
+        
+        return jsonify({
+            'results': results,
+            'count': len(postings)
+        })
+        
+    except Exception as e:
+        metrics.log_error(f"Error in fit_score: {str(e)}")
+        return jsonify({
+            'error': 'Failed to score postings',
+            'details': str(e)
+        }), 500
+
+@app.route('/api/parse-resume', methods=['POST'])
+def parse_resume():
+    """Extract typed blocks, sections and experience from an uploaded resume PDF."""
+    # Reject oversized uploads from the declared length before reading the body
+    if request.content_length is None:
+        return jsonify({'error': 'Content-Length is required'}), 411
+    if request.content_length > RESUME_UPLOAD_MAX_BYTES:
+        return jsonify({'error': f'Resumes may be at most {RESUME_UPLOAD_MAX_BYTES} bytes'}), 413
+    
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'No file provided'}), 400
+    if upload.stream.read(5) != b'%PDF-':
+        return jsonify({'error': 'The file is not a PDF'}), 400
+    
+    # Clients asking for NDJSON get the blocks as they are extracted, page by page
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        blocks = (json.dumps(block) + '\n' for block in iter_blocks(iter_pages(upload.stream)))
+        return Response(stream_with_context(blocks), mimetype='application/x-ndjson')
+    
+    resume_parser = ResumeParser(upload.stream, use_cache=False, file_name=upload.filename)
+    if not resume_parser.blocks:
+        return jsonify({'error': 'No text could be extracted from the PDF'}), 422
+    return jsonify({
+        'file_name': resume_parser.file_name,
+        'blocks': resume_parser.blocks,
+        'sections': [{'heading': heading, 'text': text} for heading, text in resume_parser.sections],
+        'experience': parse_experience_blocks(resume_parser.blocks)
+    })
+
+def get_session_id(data):
+    """Return the client's session id, or a new one if none was sent."""
+    session_id = data.get('session_id') or request.headers.get('X-Session-Id')
+    if not session_id:
+        session_id = SessionStore.new_session_id()
+    # Clients may send numeric ids in JSON
+    return str(session_id)[:64]
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Liveness check that never waits on heavy resources."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/ready', methods=['GET'])
+@app.route('/api/candidates/<candidate_id>/ready', methods=['GET'])
+def ready(candidate_id=None):
+    """Readiness check, passing once the resources needed to serve chat have been built."""
+    required = get_serving_resources(candidate_id)
+    # Without WARMUP_ON_START nothing is built until the first request, so the probe starts the build
+    unbuilt = [resource for resource in required if resource.status() not in ('ready', 'loading')]
+    if unbuilt:
+        warm_up(unbuilt)
+    is_ready = all(resource.ready for resource in required)
+    return jsonify({'ready': is_ready, 'resources': get_resource_status(candidate_id)}), 200 if is_ready else 503
+
+@app.route('/api/candidates', methods=['GET'])
+def list_candidates():
+    """List the candidates this server can answer for."""
+    return jsonify({
+        'default': candidates.default_id,
+        'candidates': [
+            {'id': candidate_id, 'name': config['name'], 'loaded': candidates.is_loaded(candidate_id)}
+            for candidate_id, config in candidates.configs.items()
+        ]
+    })
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """Report response cache hit and miss counters."""
+    if candidates.response_cache is None:
+        stats = {'enabled': False}
+    else:
+        stats = {'enabled': True, **candidates.response_cache.stats()}
+    if candidates.state_store is not None:
+        stats['state_store'] = candidates.state_store.stats()
+    return jsonify(stats)
+
 @app.route('/api/chat', methods=['POST'])
-def chat():
+@app.route('/api/candidates/<candidate_id>/chat', methods=['POST'])
+def chat(candidate_id=None):
+    data = request.json
+    user_message = data.get('message', '')
+    
+    if not user_message:
+        return jsonify({'error': 'No message provided'}), 400
+    
+    # Each visitor keeps their own conversation history
+    chat_handler = get_chat_handler(candidate_id)
+    session_id = get_session_id(data)
+    reply = chat_handler.get_reply(user_message, session_id)
+    response = jsonify({'response': reply['response'], 'session_id': session_id, 'usage': reply['usage']})
+    
+    # Tell clients when to retry if the model is over capacity
+    if reply.get('retry_after'):
+        response.status_code = 503
+        response.headers['Retry-After'] = str(int(reply['retry_after']) + 1)
+    return response
+
+def format_sse(data, event=None):
+    """Format a Server-Sent Events message with a JSON payload."""
+    message = f'event: {event}\n' if event else ''
+    return message + f'data: {json.dumps(data)}\n\n'
+
+@app.route('/api/chat/stream', methods=['POST'])
+@app.route('/api/candidates/<candidate_id>/chat/stream', methods=['POST'])
+def chat_stream(candidate_id=None):
+    """Stream the response to a chat message token by token over Server-Sent Events."""
     data = request.json
     user_message = data.get('message', '')
     
     if not user_message:
         return jsonify({'error': 'No message provided'}), 400
     
-    response = chat_handler.get_response(user_message)
-    return jsonify({'response': response})
+    chat_handler = get_chat_handler(candidate_id)
+    session_id = get_session_id(data)
+    
+    def generate():
+        yield format_sse({'session_id': session_id}, event='session')
+        try:
+            for item in chat_handler.stream_reply(user_message, session_id):
+                if isinstance(item, dict):
+                    yield format_sse({'session_id': session_id, 'usage': item['usage']}, event='done')
+                else:
+                    yield format_sse({'token': item})
+        except LLMOverloaded as e:
+            yield format_sse({'error': BUSY_MESSAGE, 'retry_after': e.retry_after}, event='error')
+        except Exception as e:
+            metrics.log_error(f"Error streaming response: {str(e)}")
+            yield format_sse({'error': ERROR_MESSAGE}, event='error')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/resume-info', methods=['GET'])
-def get_resume_info():
-    info = resume_parser.get_resume_info()
-    return jsonify(info)
+@app.route('/api/candidates/<candidate_id>/resume-info', methods=['GET'])
+def get_resume_info(candidate_id=None):
+    return cached_json_response(get_candidate(candidate_id).payload('resume_info'), RESOURCE_CACHE_MAX_AGE)
 
 
 @app.route('/api/skills', methods=['GET'])
-def get_skills():
+@app.route('/api/candidates/<candidate_id>/skills', methods=['GET'])
+def get_skills(candidate_id=None):
     """Get both explicit and inferred skills from the resume."""
-    extracted_skills = chat_handler.extracted_skills
-    inferred_skills = chat_handler.inferred_skills
-    
-    return jsonify({
-        'explicit_skills': extracted_skills,
-        'inferred_skills': inferred_skills
-    })
+    return cached_json_response(get_candidate(candidate_id).payload('skills'), RESOURCE_CACHE_MAX_AGE)
 
 @app.route('/api/experience', methods=['GET'])
-def get_experience():
+@app.route('/api/candidates/<candidate_id>/experience', methods=['GET'])
+def get_experience(candidate_id=None):
     """Get professional experience from the resume."""
+    candidate = get_candidate(candidate_id)
     try:
-        # Get the resume text from the chat handler
-        resume_text = chat_handler.resume_text
-        
-        # Initialize experience sections
-        professional_experience = []
-        other_experience = []
-        current_experience = None
-        
-        # Split resume into sections
-        sections = resume_text.split('\n\n')
-        
-        for section in sections:
-            lines = section.strip().split('\n')
-            if not lines:
-                continue
-                
-            # Check if this is a professional experience section
-            if any(line.lower().startswith(('professional experience', 'work experience', 'employment history')) for line in lines):
-                current_section = professional_experience
-            elif any(line.lower().startswith(('other experience', 'additional experience', 'volunteer experience')) for line in lines):
-                current_section = other_experience
-            else:
-                continue
-                
-            # Process each experience entry
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Check for new experience entry (usually starts with company name or position)
-                if line[0].isupper() and (' at ' in line or ' - ' in line):
-                    if current_experience:
-                        # Extract skills from the previous experience's description
-                        if current_experience.get('description'):
-                            skills = extract_skills_from_text(current_experience['description'])
-                            current_experience['skills'] = skills
-                        current_section.append(current_experience)
-                    
-                    # Extract position, company, and duration
-                    if ' at ' in line:
-                        position, rest = line.split(' at ', 1)
-                        if ' (' in rest:
-                            company, duration = rest.split(' (', 1)
-                            duration = duration.rstrip(')')
-                        else:
-                            company = rest
-                            duration = None
-                    else:
-                        position, rest = line.split(' - ', 1)
-                        if ' (' in rest:
-                            company, duration = rest.split(' (', 1)
-                            duration = duration.rstrip(')')
-                        else:
-                            company = rest
-                            duration = None
-                    
-                    current_experience = {
-                        'position': position.strip(),
-                        'company': company.strip(),
-                        'duration': duration,
-                        'description': '',
-                        'skills': []
-                    }
-                # Collect description text
-                elif current_experience:
-                    current_experience['description'] += line + ' '
-        
-        # Add the last experience if exists
-        if current_experience:
-            if current_experience.get('description'):
-                skills = extract_skills_from_text(current_experience['description'])
-                current_experience['skills'] = skills
-            if current_section == professional_experience:
-                professional_experience.append(current_experience)
-            else:
-                other_experience.append(current_experience)
-        
-        return jsonify({
-            'professional_experience': professional_experience,
-            'other_experience': other_experience
-        })
+        return cached_json_response(candidate.payload('experience'), RESOURCE_CACHE_MAX_AGE)
         
     except Exception as e:
         print(f"Error in get_experience: {str(e)}")
@@ -224,24 +481,33 @@ def send_email():
         
         if not email or not message:
             return jsonify({'error': 'Email and message are required'}), 400
+        # The address goes into the Reply-To header, so reject anything that isn't one address
+        if not is_valid_address(email):
+            return jsonify({'error': 'Invalid email address'}), 400
             
-        msg = Message(
-            subject='New Contact Form Submission',
-            recipients=[os.getenv('EMAIL_USER')],  # Your email address
-            body=f'''
-            New message from: {email}
-            
-            Message:
-            {message}
-            '''
-        )
-        
-        mail.send(msg)
-        return jsonify({'message': 'Email sent successfully'}), 200
+        # With a spool, delivery happens on the dispatcher's thread so the request doesn't wait on SMTP
+        message_id = mail_dispatcher_resource.get().enqueue({
+            'subject': 'New Contact Form Submission',
+            'recipients': [os.getenv('EMAIL_USER')],  # Your email address
+            'reply_to': email,
+            'body': f'New message from: {email}\n\nMessage:\n{message}\n'
+        })
+        if message_id is None:
+            # No spool, so it was sent during the request
+            return jsonify({'message': 'Email sent successfully'}), 200
+        return jsonify({'message': 'Email queued', 'id': message_id}), 202
         
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        print(f"Error queueing email: {str(e)}")
         return jsonify({'error': 'Failed to send email'}), 500
 
+# Optionally build everything in the background right after startup
+if os.getenv('WARMUP_ON_START', '').lower() in ('1', 'true', 'yes'):
+    default_candidate = candidates.get()
+    warm_up([
+        nlp_resource, default_candidate.chat_handler_resource, *default_candidate.payloads.values(),
+        lambda: default_candidate.chat_handler.warm_up()
+    ])
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000) 
\ No newline at end of file
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint(value):
+    """Return a stable hash of any JSON-serializable value."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+class ArtifactCache:
+    """JSON file of artifacts derived from a source file, invalidated when the file's content changes.
+
+    Given a shared store, e.g. SQLiteStateStore, artifacts are kept there instead,
+    keyed by the source's content hash, so worker processes reuse each other's work.
+    """
+
+    def __init__(self, source_path, cache_path=None, store=None):
+        self.source_path = source_path
+        self.store = store
+        if cache_path is None:
+            cache_dir = os.getenv('ARTIFACT_CACHE_DIR')
+            if cache_dir:
+                cache_path = os.path.join(cache_dir, os.path.basename(source_path) + '.cache.json')
+            else:
+                cache_path = source_path + '.cache.json'
+        self.cache_path = cache_path
+        self.source_hash = file_hash(source_path)
+        self.namespace = f'artifacts:{self.source_hash}'
+        self._artifacts = self._load() if store is None else {}
+
+    def _load(self):
+        """Load the cached artifacts if they were derived from the current source."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading artifact cache: {str(e)}")
+            return {}
+
+        if data.get('source_hash') != self.source_hash:
+            return {}
+        return data.get('artifacts', {})
+
+    def _save(self):
+        """Write the cache atomically so concurrent readers never see a partial file."""
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'source_hash': self.source_hash, 'artifacts': self._artifacts}, file)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            # A read-only filesystem only costs us the cache, not the request
+            print(f"Error writing artifact cache: {str(e)}")
+
+    def get(self, name, depends_on=None):
+        """Return a cached artifact, or None if it is missing or stale."""
+        if self.store is not None:
+            # Artifacts are only replaced when their inputs change, so cached copies needn't be revalidated
+            entry = self.store.get(self.namespace, name, validate=False)
+        else:
+            entry = self._artifacts.get(name)
+        if entry is None or entry.get('depends_on') != fingerprint(depends_on):
+            return None
+        return entry['value']
+
+    def set(self, name, value, depends_on=None):
+        """Store an artifact, optionally tied to extra inputs besides the source file."""
+        entry = {'depends_on': fingerprint(depends_on), 'value': value}
+        if self.store is not None:
+            self.store.set(self.namespace, name, entry)
+            return
+        self._artifacts[name] = entry
+        self._save()
+
+    def get_or_compute(self, name, compute, depends_on=None):
+        """Return a cached artifact, computing and storing it on a miss."""
+        value = self.get(name, depends_on)
+        if value is None:
+            value = compute()
+            self.set(name, value, depends_on)
+        return value
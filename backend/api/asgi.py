@@ -0,0 +1,194 @@
+# ASGI entry point, run with `uvicorn asgi:application`. /api/chat and
+# /api/chat/stream are served natively on the event loop so one process can
+# hold many in-flight chats; every other route is passed through to Flask.
+import asyncio
+import json
+import os
+import re
+import time
+
+import aiohttp
+import openai
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, candidates, format_sse
+from chat_handler import BUSY_MESSAGE, ERROR_MESSAGE
+from llm_scheduler import LLMOverloaded
+from metrics import HTTP_REQUEST_SECONDS, log_error, set_trace_id
+from session_store import SessionStore
+
+# Keep-alive connections shared by every outbound OpenAI request
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 100))
+LLM_KEEPALIVE_SECONDS = int(os.getenv('LLM_KEEPALIVE_SECONDS', 30))
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+wsgi_application = WsgiToAsgi(flask_app)
+http_session = None
+
+async def startup():
+    """Open the pooled HTTP client and build heavy resources off the event loop."""
+    global http_session
+    connector = aiohttp.TCPConnector(limit=LLM_POOL_SIZE, keepalive_timeout=LLM_KEEPALIVE_SECONDS)
+    http_session = aiohttp.ClientSession(connector=connector)
+    try:
+        await asyncio.to_thread(lambda: candidates.get().chat_handler.warm_up())
+    except Exception as e:
+        # Requests will retry the build on first use
+        log_error(f"Error warming up chat handler: {str(e)}")
+
+async def shutdown():
+    if http_session is not None:
+        await http_session.close()
+
+async def read_json(receive):
+    """Read and decode a JSON request body."""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return json.loads(body or b'{}')
+
+async def send_json(send, data, status=200, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')] + CORS_HEADERS + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode('utf-8')})
+
+def get_session_id(scope, data):
+    """Return the client's session id, or a new one if none was sent."""
+    headers = dict(scope['headers'])
+    session_id = data.get('session_id') or headers.get(b'x-session-id', b'').decode('latin-1')
+    if not session_id:
+        session_id = SessionStore.new_session_id()
+    # Clients may send numeric ids in JSON
+    return str(session_id)[:64]
+
+async def get_chat_handler(candidate_id):
+    """Return the candidate's chat handler, building it off the event loop on first use."""
+    candidate = candidates.get(candidate_id)
+    if candidate.chat_handler_resource.ready:
+        return candidate.chat_handler
+    return await asyncio.to_thread(lambda: candidate.chat_handler)
+
+async def chat(scope, receive, send, candidate_id=None):
+    try:
+        data = await read_json(receive)
+    except ValueError:
+        return await send_json(send, {'error': 'Invalid JSON'}, 400)
+    user_message = data.get('message', '')
+    if not user_message:
+        return await send_json(send, {'error': 'No message provided'}, 400)
+
+    chat_handler = await get_chat_handler(candidate_id)
+    session_id = get_session_id(scope, data)
+    reply = await chat_handler.aget_reply(user_message, session_id)
+    body = {'response': reply['response'], 'session_id': session_id, 'usage': reply['usage']}
+    if reply.get('retry_after'):
+        # Same hint as the Flask route gives
+        return await send_json(send, body, 503, [(b'retry-after', str(int(reply['retry_after']) + 1).encode('latin-1'))])
+    await send_json(send, body)
+
+async def chat_stream(scope, receive, send, candidate_id=None):
+    try:
+        data = await read_json(receive)
+    except ValueError:
+        return await send_json(send, {'error': 'Invalid JSON'}, 400)
+    user_message = data.get('message', '')
+    if not user_message:
+        return await send_json(send, {'error': 'No message provided'}, 400)
+
+    chat_handler = await get_chat_handler(candidate_id)
+    session_id = get_session_id(scope, data)
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no')
+        ] + CORS_HEADERS
+    })
+
+    async def emit(message):
+        await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+
+    await emit(format_sse({'session_id': session_id}, event='session'))
+    try:
+        async for item in chat_handler.astream_reply(user_message, session_id):
+            if isinstance(item, dict):
+                await emit(format_sse({'session_id': session_id, 'usage': item['usage']}, event='done'))
+            else:
+                await emit(format_sse({'token': item}))
+    except LLMOverloaded as e:
+        await emit(format_sse({'error': BUSY_MESSAGE, 'retry_after': e.retry_after}, event='error'))
+    except Exception as e:
+        log_error(f"Error streaming response: {str(e)}")
+        await emit(format_sse({'error': ERROR_MESSAGE}, event='error'))
+    await send({'type': 'http.response.body', 'body': b''})
+
+ROUTES = {
+    'chat': chat,
+    'chat/stream': chat_stream
+}
+
+# /api/chat serves the default candidate, /api/candidates/<id>/chat a specific one
+ROUTE_PATTERN = re.compile(r'^/api/(?:candidates/(?P<candidate_id>[^/]+)/)?(?P<route>chat|chat/stream)$')
+
+def match_route(scope):
+    """Return the native handler and candidate id for a request, or (None, None) to defer to Flask."""
+    if scope['type'] != 'http' or scope.get('method') != 'POST':
+        return None, None
+    match = ROUTE_PATTERN.match(scope.get('path', ''))
+    if match is None:
+        return None, None
+    candidate_id = match.group('candidate_id')
+    # Unknown candidates get Flask's 404 response
+    if candidate_id is not None and candidate_id not in candidates:
+        return None, None
+    return ROUTES[match.group('route')], candidate_id
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    handler, candidate_id = match_route(scope)
+    if handler is None:
+        return await wsgi_application(scope, receive, send)
+
+    # openai reads its aiohttp session from a context variable, so point every request at the shared pool
+    if http_session is not None:
+        openai.aiosession.set(http_session)
+    await traced(handler, scope, receive, send, candidate_id)
+
+async def traced(handler, scope, receive, send, candidate_id):
+    """Run a native handler with a trace id and record its latency like the Flask routes."""
+    headers = dict(scope['headers'])
+    trace_id = set_trace_id(headers.get(b'x-request-id', b'').decode('latin-1') or None)
+    started = time.perf_counter()
+    status = 500
+
+    async def send_traced(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            message = {**message, 'headers': list(message.get('headers', [])) + [(b'x-request-id', trace_id.encode())]}
+        await send(message)
+
+    try:
+        await handler(scope, receive, send_traced, candidate_id)
+    finally:
+        route = scope['path'] if candidate_id is None else scope['path'].replace(f'/{candidate_id}/', '/<candidate_id>/', 1)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method='POST', status=str(status))
@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+# Benchmarks import the backend modules from the directory above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.llms.base import LLM
+from langchain.schema.output import GenerationChunk
+
+class FakeChatModel(LLM):
+    """Deterministic stand-in for ChatOpenAI with a configurable latency.
+
+    Each prompt gets the same answer every time, so response caching behaves as it
+    would in production. latency is the time to the first token and token_latency
+    the gap between streamed tokens.
+    """
+
+    latency: float = 0.2
+    token_latency: float = 0.01
+    tokens: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _answer(self, prompt):
+        digest = hashlib.blake2b(prompt.encode('utf-8'), digest_size=4).hexdigest()
+        return [f"word{i}-{digest} " for i in range(self.tokens)]
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        time.sleep(self.latency + self.token_latency * self.tokens)
+        return ''.join(self._answer(prompt))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        await asyncio.sleep(self.latency + self.token_latency * self.tokens)
+        return ''.join(self._answer(prompt))
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        time.sleep(self.latency)
+        for token in self._answer(prompt):
+            time.sleep(self.token_latency)
+            yield GenerationChunk(text=token)
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for token in self._answer(prompt):
+            await asyncio.sleep(self.token_latency)
+            yield GenerationChunk(text=token)
+
+def use_fakes(latency=0.2, token_latency=0.01, tokens=40):
+    """Swap in the fake model and the bundled GitHub fixture. Call before importing app."""
+    os.environ['GITHUB_OFFLINE'] = '1'
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+    import candidate_registry
+    import chat_handler
+    factory = lambda: FakeChatModel(latency=latency, token_latency=token_latency, tokens=tokens)
+    candidate_registry.create_llm = factory
+    chat_handler.create_llm = factory
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[rank]
@@ -0,0 +1,168 @@
+# Concurrent load test for /api/chat, run from backend/api:
+#
+#   python bench/load.py --requests 500 --concurrency 32          # in-process Flask server, fake model
+#   python bench/load.py --asgi --requests 500 --concurrency 200  # in-process ASGI server, fake model
+#   python bench/load.py --url http://localhost:5000             # an already running server
+#
+# The in-process servers answer with a deterministic fake model and the bundled
+# GitHub fixture, so results only reflect the service's own overhead.
+import argparse
+import itertools
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fakes import percentile, use_fakes
+
+QUESTIONS = [
+    "Do you know Docker and Kubernetes?",
+    "What experience do you have with React and Vue.js?",
+    "Tell me about your GitHub projects",
+    "Have you used Python in production?",
+    "What did you do at Constella Intelligence?",
+    "How do you approach testing?",
+    "What is your strongest skill?",
+    "Why are you interested in this role?"
+]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/api/health', timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f'Server at {url} did not start')
+
+def start_server(asgi=False):
+    """Serve the app on a local port in a background thread, returning its URL."""
+    port = free_port()
+    if asgi:
+        import uvicorn
+        from asgi import application
+        server = uvicorn.Server(uvicorn.Config(application, host='127.0.0.1', port=port, log_level='warning'))
+        target = server.run
+    else:
+        from werkzeug.serving import make_server
+        from app import app
+        # Per-request access logs would dominate the output
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        target = make_server('127.0.0.1', port, app, threaded=True).serve_forever
+    threading.Thread(target=target, daemon=True).start()
+    url = f'http://127.0.0.1:{port}'
+    wait_until_up(url)
+    return url
+
+def chat_once(http, url, question, session_id, stream):
+    """Send one chat message, returning (status, seconds, seconds to first token or None)."""
+    started = time.perf_counter()
+    if not stream:
+        response = http.post(f'{url}/api/chat', json={'message': question, 'session_id': session_id}, timeout=120)
+        return response.status_code, time.perf_counter() - started, None
+
+    first_token = None
+    with http.post(f'{url}/api/chat/stream', json={'message': question, 'session_id': session_id},
+                   stream=True, timeout=120) as response:
+        for line in response.iter_lines():
+            if first_token is None and line.startswith(b'data: {"token"'):
+                first_token = time.perf_counter() - started
+            if line.startswith(b'event: error'):
+                return 503, time.perf_counter() - started, first_token
+        return response.status_code, time.perf_counter() - started, first_token
+
+def run(url, total, concurrency, stream=False, unique=0.0, sessions=None):
+    """Send total requests from concurrency workers, returning per-request results and the wall time."""
+    counter = itertools.count()
+    results = []
+    lock = threading.Lock()
+    sessions = sessions or concurrency
+
+    def worker(worker_id):
+        http = requests.Session()
+        while True:
+            index = next(counter)
+            if index >= total:
+                return
+            question = QUESTIONS[index % len(QUESTIONS)]
+            # A share of questions is made unique so they can't be answered from the response cache
+            if unique and (index * 7919 % 1000) / 1000 < unique:
+                question += f" (request {index})"
+            session_id = f'load-{worker_id % sessions}'
+            try:
+                result = chat_once(http, url, question, session_id, stream)
+            except requests.RequestException:
+                result = (0, 0.0, None)
+            with lock:
+                results.append(result)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return results, time.perf_counter() - started
+
+def summarize(results, elapsed):
+    ok = [seconds for status, seconds, _ in results if status == 200]
+    first_tokens = [first for status, _, first in results if status == 200 and first is not None]
+    summary = {
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(ok, 50) * 1000, 2),
+        'p95_ms': round(percentile(ok, 95) * 1000, 2),
+        'p99_ms': round(percentile(ok, 99) * 1000, 2)
+    }
+    if first_tokens:
+        summary['first_token_p50_ms'] = round(percentile(first_tokens, 50) * 1000, 2)
+        summary['first_token_p95_ms'] = round(percentile(first_tokens, 95) * 1000, 2)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the chat endpoint.')
+    parser.add_argument('--url', help='Test a running server instead of an in-process one with a fake model')
+    parser.add_argument('--asgi', action='store_true', help='Serve the in-process app through the ASGI entry point')
+    parser.add_argument('--requests', type=int, default=200, help='Total requests to send')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at once')
+    parser.add_argument('--sessions', type=int, default=None, help='Distinct conversations (default: one per worker)')
+    parser.add_argument('--stream', action='store_true', help='Use /api/chat/stream and report time to first token')
+    parser.add_argument('--unique', type=float, default=0.5, help='Share of questions made unique to defeat the response cache')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake model time to first token, in seconds')
+    parser.add_argument('--token-latency', type=float, default=0.005, help='Fake model time between tokens, in seconds')
+    parser.add_argument('--max-p95-ms', type=float, help='Exit with status 1 if p95 latency exceeds this')
+    args = parser.parse_args(argv)
+
+    url = args.url
+    if url is None:
+        use_fakes(latency=args.latency, token_latency=args.token_latency)
+        url = start_server(args.asgi)
+        # Build the default candidate before timing anything
+        requests.post(f'{url}/api/chat', json={'message': 'warm up', 'session_id': 'warmup'}, timeout=300)
+
+    results, elapsed = run(url.rstrip('/'), args.requests, args.concurrency, args.stream, args.unique, args.sessions)
+    summary = summarize(results, elapsed)
+    try:
+        summary['cache'] = requests.get(f'{url}/api/cache-stats', timeout=5).json()
+    except (requests.RequestException, ValueError):
+        pass
+    print(json.dumps(summary, indent=2))
+
+    if args.max_p95_ms is not None and summary['p95_ms'] > args.max_p95_ms:
+        print(f"p95 latency {summary['p95_ms']}ms is over the {args.max_p95_ms}ms budget", file=sys.stderr)
+        return 1
+    return 1 if summary['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# Microbenchmarks for the hot paths that don't need a model, run from backend/api:
+#
+#   python bench/micro.py                       # print timings
+#   python bench/micro.py --save baseline.json  # record a baseline
+#   python bench/micro.py --compare baseline.json --tolerance 0.25
+#
+# With --compare the exit status is 1 if any benchmark got slower than the
+# baseline by more than the tolerance, so it can gate a deploy.
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from fakes import FakeChatModel, percentile, use_fakes
+
+use_fakes(latency=0, token_latency=0)
+
+import skill_matcher
+from chat_handler import ChatHandler
+from experience_parser import parse_experience, parse_experience_blocks
+from history_manager import ChatHistory
+from resume_parser import ResumeParser
+
+RESUME_PATH = 'venkata-aduri.pdf'
+QUESTIONS = [
+    "Do you know Docker and Kubernetes?",
+    "What experience do you have with React, Vue.js and TypeScript?",
+    "Tell me about your GitHub projects",
+    "Have you used k8s or golang in production?",
+    "What did you do at Constella Intelligence?"
+]
+
+def measure(fn, min_time=0.5, min_runs=5):
+    """Call fn repeatedly for at least min_time seconds, returning per-call durations in seconds."""
+    durations = []
+    deadline = time.perf_counter() + min_time
+    while len(durations) < min_runs or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+def cycle(values):
+    """Return a function that hands out the values in turn, forever."""
+    state = {'index': 0}
+    def next_value():
+        value = values[state['index'] % len(values)]
+        state['index'] += 1
+        return value
+    return next_value
+
+def build_benchmarks():
+    parser = ResumeParser(RESUME_PATH, use_cache=False)
+    handler = ChatHandler(parser, llm=FakeChatModel(latency=0, token_latency=0), response_cache=None)
+    handler.warm_up()
+    history = ChatHistory(lambda summary, new_lines: summary)
+    texts = [parser.resume_text] + [section for _, section in parser.sections]
+    fast_extract = lambda batch: skill_matcher.extract_skills_from_texts(batch)
+    next_question = cycle(QUESTIONS)
+    next_text = cycle(texts)
+    postings = (texts * 1000)[:1000]
+
+    benchmarks = {
+        'resume_parser.extract_text': lambda: parser._extract_text(),
+        'resume_parser.extract_text_and_blocks': lambda: parser._extract(),
+        'extract_skills_from_text.fast': lambda: skill_matcher.extract_skills_from_text(next_text()),
+        'parse_experience.blocks': lambda: parse_experience_blocks(parser.blocks, fast_extract),
+        'parse_experience.text': lambda: parse_experience(parser.resume_text, fast_extract),
+        'chat_handler.enhance_prompt_with_skills': lambda: handler._enhance_prompt_with_skills(
+            *(lambda question: (question, handler.skill_index.analyze(question)))(next_question())
+        ),
+        'chat_handler.prepare_prompt': lambda: handler._prepare_prompt(next_question(), history),
+        'intent_router.route': lambda: handler.intent_router.route(next_question()),
+        'fit_scorer.rank_1000_postings': lambda: handler.fit_scorer.rank(postings, top=20),
+        'resume_index.format_context': lambda: handler.resume_index.format_context(next_question(), handler.retrieval_top_k)
+    }
+
+    # Full extraction needs the spaCy model, which may not be installed where benchmarks run
+    try:
+        import spacy
+        nlp = spacy.load("en_core_web_sm", disable=skill_matcher.UNUSED_SPACY_COMPONENTS)
+        benchmarks['extract_skills_from_text.full'] = lambda: skill_matcher.extract_skills_from_text(next_text(), nlp)
+    except Exception as e:
+        print(f"Skipping full skill extraction: {str(e)}", file=sys.stderr)
+
+    handler.close()
+    return benchmarks
+
+def run(selected=None, min_time=0.5):
+    results = {}
+    for name, fn in build_benchmarks().items():
+        if selected and not any(part in name for part in selected):
+            continue
+        durations = measure(fn, min_time)
+        results[name] = {
+            'runs': len(durations),
+            'mean_us': statistics.mean(durations) * 1e6,
+            'p50_us': percentile(durations, 50) * 1e6,
+            'p95_us': percentile(durations, 95) * 1e6
+        }
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return the benchmarks whose median regressed past the tolerance."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result['p50_us'] > before['p50_us'] * (1 + tolerance):
+            regressions.append((name, before['p50_us'], result['p50_us']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the chat backend microbenchmarks.')
+    parser.add_argument('only', nargs='*', help='Only run benchmarks whose name contains one of these')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend on each benchmark')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown of the median, e.g. 0.25 for 25%%')
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.min_time)
+    print(f"{'benchmark':45} {'runs':>8} {'mean':>12} {'p50':>12} {'p95':>12}")
+    for name, result in results.items():
+        print(f"{name:45} {result['runs']:8d} {result['mean_us']:10.1f}us {result['p50_us']:10.1f}us {result['p95_us']:10.1f}us")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: p50 {before:.1f}us -> {after:.1f}us", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from chat_handler import DEFAULT_CANDIDATE_NAME, DEFAULT_GITHUB_USERNAME, ChatHandler, create_llm
+from lazy_resource import LazyResource
+from llm_scheduler import create_llm_scheduler
+from response_cache import create_response_cache
+from resume_parser import ResumeParser
+from state_store import create_state_store
+
+DEFAULT_CANDIDATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'candidates.json')
+
+def load_candidate_configs(path=None):
+    """Read candidate definitions from a JSON file mapping candidate ids to name, resume and github."""
+    path = path or os.getenv('CANDIDATES_FILE') or DEFAULT_CANDIDATES_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        # Fall back to the single resume bundled with the app
+        data = {'venkata-aduri': {'resume': 'venkata-aduri.pdf'}}
+        path = DEFAULT_CANDIDATES_FILE
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    configs = OrderedDict()
+    for candidate_id, config in data.items():
+        resume = config['resume']
+        configs[candidate_id] = {
+            'name': config.get('name', DEFAULT_CANDIDATE_NAME),
+            # Resume paths are relative to the candidates file
+            'resume': resume if os.path.isabs(resume) else os.path.join(base_dir, resume),
+            'github': config.get('github', DEFAULT_GITHUB_USERNAME)
+        }
+    return configs
+
+class Candidate:
+    """One candidate's resume, chat handler and derived payloads, each built on first use."""
+
+    def __init__(self, candidate_id, config, registry, payload_builders):
+        self.id = candidate_id
+        self.name = config['name']
+        self.resume_parser_resource = LazyResource('resume_parser', lambda: ResumeParser(
+            config['resume'], store=registry.state_store
+        ))
+        self.chat_handler_resource = LazyResource('chat_handler', lambda: ChatHandler(
+            self.resume_parser,
+            name=config['name'],
+            github_username=config['github'],
+            llm=registry.llm,
+            scheduler=registry.scheduler,
+            response_cache=registry.response_cache,
+            state_store=registry.state_store,
+            state_namespace=candidate_id
+        ))
+        # Read-only responses derived from the resume, e.g. experience and skills
+        self.payloads = {
+            name: LazyResource(name, lambda build=build: build(self))
+            for name, build in payload_builders.items()
+        }
+
+    @property
+    def resume_parser(self):
+        return self.resume_parser_resource.get()
+
+    @property
+    def chat_handler(self):
+        return self.chat_handler_resource.get()
+
+    def payload(self, name):
+        return self.payloads[name].get()
+
+    def resources(self):
+        """Return every lazily initialized resource of this candidate."""
+        resources = [self.resume_parser_resource, self.chat_handler_resource, *self.payloads.values()]
+        if self.chat_handler_resource.ready:
+            resources += self.chat_handler.resources
+        return resources
+
+    def close(self):
+        if self.chat_handler_resource.ready:
+            self.chat_handler.close()
+
+class CandidateRegistry:
+    """Candidates keyed by id, keeping only the most recently used ones loaded."""
+
+    def __init__(self, configs, payload_builders=None, max_loaded=16, default_id=None):
+        self.configs = configs
+        self.payload_builders = payload_builders or {}
+        self.max_loaded = max_loaded
+        self.default_id = default_id or next(iter(configs), None)
+
+        # The model client, scheduler and response cache are shared so limits apply process-wide
+        self._llm = LazyResource('llm', create_llm)
+        self.scheduler = create_llm_scheduler()
+        self.response_cache = create_response_cache()
+        # Conversations and derived resume data, shared with other worker processes if configured
+        self.state_store = create_state_store()
+
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def llm(self):
+        return self._llm.get()
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self.configs
+
+    def ids(self):
+        return list(self.configs)
+
+    def get(self, candidate_id=None):
+        """Return a candidate, loading it and evicting the least recently used one if needed."""
+        candidate_id = candidate_id or self.default_id
+        if candidate_id not in self.configs:
+            raise KeyError(candidate_id)
+
+        evicted = []
+        with self._lock:
+            candidate = self._loaded.get(candidate_id)
+            if candidate is None:
+                # Building the candidate is cheap; its heavy state is built lazily on first use
+                candidate = Candidate(candidate_id, self.configs[candidate_id], self, self.payload_builders)
+                self._loaded[candidate_id] = candidate
+                while len(self._loaded) > self.max_loaded:
+                    evicted.append(self._loaded.popitem(last=False)[1])
+            self._loaded.move_to_end(candidate_id)
+
+        # Requests still holding an evicted candidate finish normally
+        for stale in evicted:
+            stale.close()
+        return candidate
+
+    def loaded(self):
+        """Return the candidates currently loaded, least recently used first."""
+        with self._lock:
+            return list(self._loaded.values())
+
+    def is_loaded(self, candidate_id=None):
+        return (candidate_id or self.default_id) in self._loaded
+
+    def __len__(self):
+        return len(self._loaded)
+
+def create_candidate_registry(payload_builders=None):
+    """Build the registry configured by the environment."""
+    return CandidateRegistry(
+        load_candidate_configs(),
+        payload_builders,
+        max_loaded=int(os.getenv('MAX_LOADED_CANDIDATES', 16)),
+        default_id=os.getenv('DEFAULT_CANDIDATE') or None
+    )
@@ -1,123 +1,251 @@
+import asyncio
 import os
+import threading
+import time
 import json
-import requests
 from langchain.chat_models import ChatOpenAI
-from langchain.chains import ConversationChain
-from langchain.memory import ConversationBufferMemory
+from langchain.chains import LLMChain
+from langchain.memory.prompt import SUMMARY_PROMPT
 from langchain.prompts import PromptTemplate
+from experience_parser import parse_experience_blocks
+from fit_scoring import FitScorer
+from github_snapshot import create_github_snapshot
+from history_manager import ChatHistory, count_tokens, format_turns
+from intent_router import IntentRouter
+from metrics import (
+    CHAT_ERRORS, CHAT_FIRST_TOKEN_SECONDS, CHAT_REPLIES, CHAT_STAGE_SECONDS, COMPLETION_TOKENS, PROMPT_TOKENS, log_error
+)
+from llm_scheduler import LLMOverloaded, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, create_llm_scheduler
+from lazy_resource import LazyResource
+from prompt_prefix import PromptPrefix
+from response_cache import create_response_cache
+from retrieval import ResumeIndex
+from session_store import SessionStore
+from skill_index import SKILL_INDEX_VERSION, SkillIndex, transitive_closure
+
+# Words and phrases that mark a question as being about skills or GitHub work
+SKILL_KEYWORDS = frozenset([
+    "skill", "skills", "technology", "technologies", "programming", "language", "languages",
+    "framework", "frameworks", "tool", "tools", "software", "platform", "platforms",
+    "experience with", "knowledge of", "proficient in", "familiar with", "know", "knowledge",
+    "use", "used", "using", "work with", "worked with", "expertise", "proficiency"
+])
+GITHUB_KEYWORDS = frozenset([
+    "github", "repository", "repositories", "repo", "repos", "project", "projects", "code",
+    "programming", "work", "worked", "portfolio", "build", "built", "created", "developed"
+])
+GENERAL_GITHUB_KEYWORDS = frozenset(["github", "repository", "repositories", "project", "projects"])
+
+# How much confidence an inferred skill keeps per hop through the skill graph
+INFERENCE_DECAY = 0.6
+
+# The candidate served when none is configured
+DEFAULT_CANDIDATE_NAME = "Venkata Naveen Aduri"
+DEFAULT_GITHUB_USERNAME = "naveenaduri"
+
+ERROR_MESSAGE = "I apologize, but I'm having trouble processing your request at the moment."
+BUSY_MESSAGE = "I'm answering a lot of questions right now. Please try again in a moment."
+
+def create_llm():
+    """Create the chat model used to answer questions."""
+    return ChatOpenAI(
+        temperature=0.7,
+        model_name="gpt-3.5-turbo",
+        # Retries are handled by the scheduler, with backoff outside the concurrency slot
+        max_retries=1
+    )
 
 class ChatHandler:
-    def __init__(self, resume_parser):
+    def __init__(self, resume_parser, max_sessions=None, session_ttl=None, max_turns_per_session=None, token_budget=None, retrieval_top_k=None,
+                 name=DEFAULT_CANDIDATE_NAME, github_username=DEFAULT_GITHUB_USERNAME, llm=None, scheduler=None, response_cache=None,
+                 state_store=None, state_namespace=None):
         self.resume_parser = resume_parser
+        self.name = name
+        self.github_username = github_username
         self.resume_text = resume_parser.get_resume_info()['raw_text']
         
-        # Initialize the language model
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-3.5-turbo"
-        )
+        # Number of resume chunks put into the prompt for each question
+        self.retrieval_top_k = retrieval_top_k or int(os.getenv("RETRIEVAL_TOP_K", 4))
+        
+        # Initialize the language model; candidates served from one process share it
+        self.llm = llm or create_llm()
+        
+        # Every outbound model call goes through the scheduler
+        self.scheduler = scheduler or create_llm_scheduler()
         
-        # Create a custom prompt template that's compatible with the memory system
+        # Factual lookups like "do you know Docker?" are answered from templates without the model
+        self.fast_path_answers = os.getenv("FAST_PATH_ANSWERS", "1").lower() not in ("0", "false", "no")
+        
+        # The static prefix goes first so providers can cache it; per-question content comes last
         self.prompt = PromptTemplate(
-            input_variables=["chat_history", "human_input"],
-            template=f"""You are Venkata Naveen Aduri, and you are having a conversation with someone who wants to interview you. 
-Here is your resume information:
-
-{self.resume_text}
+            input_variables=["resume_context", "chat_history", "human_input"],
+            partial_variables={"name": name, "prefix": lambda: self.prompt_prefix.text},
+            template="""{prefix}
 
-You should respond as if you are Venkata Naveen Aduri, using first-person perspective. Be direct and personal in your responses.
+Here are the parts of your resume and GitHub projects most relevant to the question:
 
-IMPORTANT INSTRUCTIONS:
-1. Always speak in first person ("I", "my", "me")
-2. Be direct and personal
-3. Share your experiences and opinions
-4. Be professional but friendly
-5. If asked about skills or technologies not explicitly mentioned in your resume:
-   - Make reasonable inferences based on your existing experience
-   - Connect related technologies to what you do know
-   - Be confident but honest about your knowledge
-   - If you truly don't know something, say so directly
-6. Build upon previous responses to maintain a coherent narrative
-7. Never say things like "What would you like to know about me?" - instead, be proactive in sharing your experiences
-8. When discussing your GitHub projects, be specific about what you built and the technologies used
-9. When discussing skills, always mention relevant projects from your GitHub repositories
+{resume_context}
 
 Previous conversation:
-{{chat_history}}
+{chat_history}
 
-Human: {{human_input}}
-Venkata Naveen Aduri:"""
+Human: {human_input}
+{name}:"""
         )
         
-        # Configure memory
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            input_key="human_input",
-            output_key="text",
-            return_messages=False
-        )
+        # Chains for answering questions and for summarizing older turns
+        self.conversation = LLMChain(llm=self.llm, prompt=self.prompt)
+        self.summary_chain = LLMChain(llm=self.llm, prompt=SUMMARY_PROMPT)
         
-        # Create a conversation chain with the custom prompt
-        self.conversation = ConversationChain(
-            llm=self.llm,
-            prompt=self.prompt,
-            memory=self.memory,
-            verbose=True,
-            input_key="human_input",
-            output_key="text"
+        # Limits for per-visitor conversation memory
+        self.max_turns_per_session = max_turns_per_session or int(os.getenv("MAX_TURNS_PER_SESSION", 4))
+        self.token_budget = token_budget or int(os.getenv("HISTORY_TOKEN_BUDGET", 1500))
+        self.sessions = SessionStore(
+            self._create_history,
+            max_sessions=max_sessions or int(os.getenv("MAX_SESSIONS", 1000)),
+            ttl_seconds=session_ttl or int(os.getenv("SESSION_TTL_SECONDS", 3600)),
+            # With a shared store every worker process sees the same conversations
+            store=state_store,
+            namespace=f"sessions:{state_namespace or name}"
         )
+        # Summaries running on the event loop after their replies were sent
+        self._compaction_tasks = set()
         
-        # Set up the initial context
-        self._set_initial_context()
+        # Answers to repeated questions are served from the cache instead of the model
+        self.response_cache = response_cache if response_cache is not None else create_response_cache()
         
         # Initialize skill graph for inference
         self._initialize_skill_graph()
         
-        # Fetch GitHub repositories
-        self.github_repos = self._fetch_github_repos("naveenaduri")
+        # GitHub data is read from a local snapshot that a background thread keeps fresh
+        self.github_snapshot = create_github_snapshot(github_username, on_change=self._on_github_change)
+        self.github_snapshot.start_refresh()
         
-        # Build a comprehensive skill database from resume and GitHub
-        self._build_comprehensive_skill_database()
+        # Derived data is built on first use so startup stays fast
+        self._github_repos = LazyResource("github_repos", lambda: self.github_snapshot.repos)
+        self._skill_database = LazyResource("skill_database", lambda: self._cached(
+            "skill_database",
+            self._build_comprehensive_skill_database,
+            {"skill_graph": self.skill_graph, "github_repos": self.github_repos, "version": SKILL_INDEX_VERSION}
+        ))
+        self._resume_index = LazyResource("resume_index", self._build_resume_index)
+        self._skill_index = LazyResource("skill_index", self._build_skill_index)
+        self._fit_scorer = LazyResource("fit_scorer", lambda: FitScorer(self.skill_database["skills"]))
+        self._intent_router = LazyResource("intent_router", self._build_intent_router)
+        self._prompt_prefix = LazyResource("prompt_prefix", self._build_prompt_prefix)
+        self.resources = [
+            self._github_repos, self._skill_database, self._skill_index, self._fit_scorer, self._intent_router,
+            self._resume_index, self._prompt_prefix
+        ]
     
-    def _fetch_github_repos(self, username):
-        """Fetch repositories from GitHub for the given username."""
-        try:
-            # Use GitHub API to fetch repositories
-            response = requests.get(f"https://api.github.com/users/{username}/repos")
-            if response.status_code == 200:
-                repos = response.json()
-                # Extract relevant information
-                repo_info = []
-                for repo in repos:
-                    repo_info.append({
-                        "name": repo.get("name", ""),
-                        "description": repo.get("description", ""),
-                        "url": repo.get("html_url", ""),
-                        "topics": repo.get("topics", []),
-                        "language": repo.get("language", ""),
-                        "stars": repo.get("stargazers_count", 0),
-                        "forks": repo.get("forks_count", 0)
-                    })
-                return repo_info
-            else:
-                print(f"Error fetching GitHub repos: {response.status_code}")
-                return []
-        except Exception as e:
-            print(f"Exception fetching GitHub repos: {str(e)}")
-            return []
+    @property
+    def github_repos(self):
+        return self._github_repos.get()
+    
+    @property
+    def skill_database(self):
+        return self._skill_database.get()
+    
+    @property
+    def skill_index(self):
+        return self._skill_index.get()
+    
+    @property
+    def fit_scorer(self):
+        return self._fit_scorer.get()
+    
+    @property
+    def intent_router(self):
+        return self._intent_router.get()
+    
+    @property
+    def resume_index(self):
+        return self._resume_index.get()
+    
+    @property
+    def prompt_prefix(self):
+        return self._prompt_prefix.get()
+    
+    def warm_up(self):
+        """Build every lazily initialized resource now."""
+        for resource in self.resources:
+            resource.get()
+    
+    def close(self):
+        """Stop background work so the handler can be dropped."""
+        self.github_snapshot.stop()
+    
+    def _create_history(self):
+        """Create the chat history for a new session."""
+        return ChatHistory(
+            self._summarize,
+            max_turns=self.max_turns_per_session,
+            token_budget=self.token_budget,
+            asummarize=self._asummarize
+        )
+    
+    def _summarize(self, summary, new_lines):
+        """Fold new conversation lines into the running summary."""
+        return self.scheduler.call(
+            lambda: self.summary_chain.predict(summary=summary, new_lines=new_lines),
+            priority=PRIORITY_BACKGROUND
+        ).strip()
+    
+    async def _asummarize(self, summary, new_lines):
+        """Async version of _summarize."""
+        return (await self.scheduler.acall(
+            lambda: self.summary_chain.apredict(summary=summary, new_lines=new_lines),
+            priority=PRIORITY_BACKGROUND
+        )).strip()
+    
+    def _compact_later(self, session_id, history):
+        """Summarize a session's evicted turns on a background thread, once the reply is out."""
+        threading.Thread(target=self._compact, args=(session_id, history), name='history-compaction', daemon=True).start()
+    
+    def _compact(self, session_id, history):
+        # Takes the session lock, so the visitor's next message waits for the summary instead of racing it
+        with history.lock:
+            self.sessions.sync(session_id, history)
+            history.compact()
+            self.sessions.save(session_id, history)
+    
+    def _acompact_later(self, session_id, history):
+        """Async version of _compact_later, as a task on the event loop."""
+        task = asyncio.get_running_loop().create_task(self._acompact(session_id, history))
+        # The loop only keeps weak references to tasks
+        self._compaction_tasks.add(task)
+        task.add_done_callback(self._compaction_tasks.discard)
+    
+    async def _acompact(self, session_id, history):
+        async with history.async_lock:
+            await asyncio.to_thread(self.sessions.sync, session_id, history)
+            await history.acompact()
+            await asyncio.to_thread(self.sessions.save, session_id, history)
+    
+    def _on_github_change(self):
+        """Rebuild everything derived from the GitHub repositories after the snapshot changes."""
+        resources = (
+            self._github_repos, self._skill_database, self._skill_index, self._fit_scorer, self._intent_router,
+            self._resume_index, self._prompt_prefix
+        )
+        for resource in resources:
+            resource.reset()
+        # Rebuild on the refresher thread so requests don't pay for it
+        for resource in resources:
+            resource.get()
     
     def _build_comprehensive_skill_database(self):
         """Build a comprehensive skill database from resume and GitHub repositories."""
         # Initialize the skill database
-        self.skill_database = {
+        skill_database = {
             "skills": {},  # Map of skill name to details
             "projects": {}  # Map of project name to skills used
         }
         
         # Extract skills from resume
-        resume_skills = self._extract_skills_from_resume()
+        resume_skills = self.extracted_skills
         for skill in resume_skills:
-            self.skill_database["skills"][skill] = {
+            skill_database["skills"][skill] = {
                 "source": "resume",
                 "projects": [],
                 "confidence": "high"
@@ -128,78 +256,78 @@ Venkata Naveen Aduri:"""
             # Add the primary language as a skill
             if repo["language"]:
                 lang = repo["language"]
-                if lang not in self.skill_database["skills"]:
-                    self.skill_database["skills"][lang] = {
+                if lang not in skill_database["skills"]:
+                    skill_database["skills"][lang] = {
                         "source": "github",
                         "projects": [repo["name"]],
                         "confidence": "high"
                     }
                 else:
-                    self.skill_database["skills"][lang]["projects"].append(repo["name"])
-                    if self.skill_database["skills"][lang]["source"] == "resume":
-                        self.skill_database["skills"][lang]["source"] = "both"
+                    skill_database["skills"][lang]["projects"].append(repo["name"])
+                    if skill_database["skills"][lang]["source"] == "resume":
+                        skill_database["skills"][lang]["source"] = "both"
             
             # Add topics as skills
             for topic in repo["topics"]:
-                if topic not in self.skill_database["skills"]:
-                    self.skill_database["skills"][topic] = {
+                if topic not in skill_database["skills"]:
+                    skill_database["skills"][topic] = {
                         "source": "github",
                         "projects": [repo["name"]],
                         "confidence": "medium"
                     }
                 else:
-                    self.skill_database["skills"][topic]["projects"].append(repo["name"])
-                    if self.skill_database["skills"][topic]["source"] == "resume":
-                        self.skill_database["skills"][topic]["source"] = "both"
+                    skill_database["skills"][topic]["projects"].append(repo["name"])
+                    if skill_database["skills"][topic]["source"] == "resume":
+                        skill_database["skills"][topic]["source"] = "both"
             
             # Store project information
-            self.skill_database["projects"][repo["name"]] = {
+            skill_database["projects"][repo["name"]] = {
                 "description": repo["description"],
                 "url": repo["url"],
                 "language": repo["language"],
                 "topics": repo["topics"]
             }
         
-        # Infer additional skills based on the skill graph
-        for skill in resume_skills:
-            if skill in self.skill_graph:
-                for inferred_skill in self.skill_graph[skill]:
-                    if inferred_skill not in self.skill_database["skills"]:
-                        self.skill_database["skills"][inferred_skill] = {
-                            "source": "inferred",
-                            "projects": [],
-                            "confidence": "low",
-                            "inferred_from": skill
-                        }
-    
-    def _set_initial_context(self):
-        """Set up the initial context for the conversation."""
-        # Store the resume text as a class attribute for later use
-        self.resume_text_for_prompt = self.resume_text
+        # Infer additional skills through the skill graph, trusting each hop a little less
+        inferred = transitive_closure(self.skill_graph, set(resume_skills), decay=INFERENCE_DECAY)
+        for inferred_skill, (score, inferred_from) in inferred.items():
+            if inferred_skill not in skill_database["skills"]:
+                skill_database["skills"][inferred_skill] = {
+                    "source": "inferred",
+                    "projects": [],
+                    "confidence": "low",
+                    "score": round(score, 3),
+                    "inferred_from": inferred_from
+                }
         
-        # Add initial context to the conversation
-        initial_prompt = f"""You are Venkata Naveen Aduri, and you are having a conversation with someone who wants to interview you. Here is your resume information:
-
-{self.resume_text}
-
-Please respond to questions as if you are Venkata Naveen Aduri. Be direct and personal in your responses, using first-person perspective. For example, say things like "I have experience in..." or "My skills include..." rather than "The candidate has experience in...". Be professional but friendly, and always maintain a conversational tone.
-
-When asked about skills or technologies not explicitly mentioned in your resume:
-1. Make reasonable inferences based on your existing experience
-2. Connect related technologies to what you do know
-3. Be confident but honest about your knowledge
-4. If you truly don't know something, say so directly
-
-Remember to:
-1. Always speak in first person
-2. Be direct and personal
-3. Share your experiences and opinions
-4. Be professional but friendly
-5. Build upon previous responses to maintain a coherent narrative
-6. Never say things like "What would you like to know about me?" - instead, be proactive in sharing your experiences"""
-        
-        # Add initial context to the conversation
-        self.conversation.predict(human_input=initial_prompt)
+        return skill_database
+    
+    def _build_skill_index(self):
+        """Index skill names, aliases and repository names for single-pass message analysis."""
+        return SkillIndex(self.skill_database["skills"], [repo["name"] for repo in self.github_repos])
+    
+    def _build_intent_router(self):
+        """Render the template answers for factual questions about skills, repositories, contact info and jobs."""
+        experience = parse_experience_blocks(self.resume_parser.blocks)
+        return IntentRouter(
+            self.skill_database["skills"],
+            self.fit_scorer,
+            repos=self.github_repos,
+            experience=experience["professional_experience"] + experience["other_experience"],
+            resume_text=self.resume_text,
+            github_username=self.github_username
+        )
+    
+    def _build_resume_index(self):
+        """Chunk the resume and GitHub repositories into a retrieval index."""
+        resume_index = ResumeIndex()
+        resume_index.add_sections(self.resume_parser.sections, source="resume")
+        resume_index.add_repos(self.github_repos)
+        return resume_index.build()
+    
+    def _build_prompt_prefix(self):
+        """Build the instructions and candidate profile shared by every prompt."""
+        return PromptPrefix(self.name, self.skill_database["skills"], self.github_repos)
     
     def _initialize_skill_graph(self):
         """Initialize a skill graph for making inferences about related technologies."""
@@ -218,75 +346,286 @@ Remember to:
         }
         
         # Extract skills from resume text
-        self.extracted_skills = self._extract_skills_from_resume()
-        
-        # Build inferred skills based on the skill graph
-        self.inferred_skills = self._build_inferred_skills()
+        self.extracted_skills = self._cached(
+            "extracted_skills",
+            self._extract_skills_from_resume,
+            {"skill_graph": self.skill_graph, "version": SKILL_INDEX_VERSION}
+        )
+    
+    def _cached(self, name, compute, depends_on=None):
+        """Return a derived artifact from the resume's on-disk cache, computing it on a miss."""
+        cache = getattr(self.resume_parser, "cache", None)
+        if cache is None:
+            return compute()
+        return cache.get_or_compute(name, compute, depends_on)
     
     def _extract_skills_from_resume(self):
-        """Extract skills from the resume text."""
-        # This is a simplified version - in a real implementation, this would use NLP
-        skills = []
-        for skill in self.skill_graph.keys():
-            if skill.lower() in self.resume_text.lower():
-                skills.append(skill)
-        return skills
-    
-    def _build_inferred_skills(self):
-        """Build a list of inferred skills based on the skill graph."""
-        inferred = []
-        for skill in self.extracted_skills:
-            if skill in self.skill_graph:
-                inferred.extend(self.skill_graph[skill])
-        return list(set(inferred))  # Remove duplicates
-    
-    def get_response(self, user_message):
-        """Get a response for the user's message."""
+        """Extract every skill in the skill graph that the resume text names."""
+        # Related skills count too, so e.g. "Flask" on the resume isn't left to inference
+        graph_skills = list(dict.fromkeys(
+            [*self.skill_graph, *(skill for related in self.skill_graph.values() for skill in related)]
+        ))
+        # Match whole tokens so short names like "R" or "Go" don't match inside other words
+        index = SkillIndex(graph_skills)
+        found = set(index.find_skills(index.analyze(self.resume_text)))
+        return [skill for skill in graph_skills if skill in found]
+    
+    def get_response(self, user_message, session_id=None):
+        """Get a response for the user's message within the given session."""
+        return self.get_reply(user_message, session_id)["response"]
+    
+    def get_reply(self, user_message, session_id=None):
+        """Get a response for the user's message along with its prompt token usage."""
         try:
-            # Check if the question is about skills or technologies
-            if self._is_skill_question(user_message):
-                # Enhance the prompt with skill inference information
-                enhanced_prompt = self._enhance_prompt_with_skills(user_message)
-                user_message = enhanced_prompt
-            
-            # Check if the question is about GitHub repositories
-            if self._is_github_question(user_message):
-                # Enhance the prompt with GitHub repository information
-                enhanced_prompt = self._enhance_prompt_with_github(user_message)
-                user_message = enhanced_prompt
+            history = self._get_history(session_id)
+            with history.lock:
+                prompt_values, usage, cache_context, response = self._prepare_reply(user_message, history, session_id)
+                if response is None:
+                    # Get response from the model; identical in-flight prompts share one call
+                    with CHAT_STAGE_SECONDS.time(stage="llm"):
+                        response = self.scheduler.call(
+                            lambda: self.conversation.predict(**prompt_values),
+                            key=self.prompt.format(**prompt_values),
+                            priority=PRIORITY_INTERACTIVE,
+                            cost=usage["prompt_tokens"]
+                        )
+                    self._cache_response(user_message, cache_context, response)
+                self._record_reply(usage, response)
+                
+                # Remember the visitor's own words; the enhancements are rebuilt every turn
+                with CHAT_STAGE_SECONDS.time(stage="memory_write"):
+                    if history.add_turn(user_message, response):
+                        self._compact_later(session_id, history)
+                    self.sessions.save(session_id, history)
             
-            # Get response from the model
-            response = self.conversation.predict(human_input=user_message)
+            return {"response": response, "usage": usage}
+        except LLMOverloaded as e:
+            CHAT_ERRORS.inc(type="overloaded")
+            return {"response": BUSY_MESSAGE, "usage": None, "retry_after": e.retry_after}
+        except Exception as e:
+            CHAT_ERRORS.inc(type=type(e).__name__)
+            log_error(f"Error generating response: {str(e)}")
+            return {"response": ERROR_MESSAGE, "usage": None}
+    
+    async def aget_reply(self, user_message, session_id=None):
+        """Async version of get_reply that awaits the model instead of blocking a worker."""
+        try:
+            # Session lookup and prompt building may build lazy resources, so keep them off the event loop
+            history = await asyncio.to_thread(self._get_history, session_id)
+            async with history.async_lock:
+                prompt_values, usage, cache_context, response = await asyncio.to_thread(
+                    self._prepare_reply, user_message, history, session_id
+                )
+                if response is None:
+                    with CHAT_STAGE_SECONDS.time(stage="llm"):
+                        response = await self.scheduler.acall(
+                            lambda: self.conversation.apredict(**prompt_values),
+                            key=self.prompt.format(**prompt_values),
+                            priority=PRIORITY_INTERACTIVE,
+                            cost=usage["prompt_tokens"]
+                        )
+                    await asyncio.to_thread(self._cache_response, user_message, cache_context, response)
+                self._record_reply(usage, response)
+                
+                with CHAT_STAGE_SECONDS.time(stage="memory_write"):
+                    if history.add_turn(user_message, response):
+                        self._acompact_later(session_id, history)
+                    await asyncio.to_thread(self.sessions.save, session_id, history)
             
-            return response
+            return {"response": response, "usage": usage}
+        except LLMOverloaded as e:
+            CHAT_ERRORS.inc(type="overloaded")
+            return {"response": BUSY_MESSAGE, "usage": None, "retry_after": e.retry_after}
+        except Exception as e:
+            CHAT_ERRORS.inc(type=type(e).__name__)
+            log_error(f"Error generating response: {str(e)}")
+            return {"response": ERROR_MESSAGE, "usage": None}
+    
+    def stream_reply(self, user_message, session_id=None):
+        """Yield the response to the user's message as the model generates it.
+        
+        The final value yielded is a dict with the prompt token usage. The turn is
+        only committed to the session history once the whole response has streamed.
+        """
+        started = time.perf_counter()
+        try:
+            history = self._get_history(session_id)
+            with history.lock:
+                prompt_values, usage, cache_context, response = self._prepare_reply(user_message, history, session_id)
+                if response is not None:
+                    CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+                    yield response
+                else:
+                    chunks = []
+                    prompt_text = self.prompt.format(**prompt_values)
+                    with CHAT_STAGE_SECONDS.time(stage="llm"):
+                        for chunk in self.scheduler.stream(lambda: self.llm.stream(prompt_text), cost=usage["prompt_tokens"]):
+                            # Chat models yield message chunks, plain LLMs yield strings
+                            token = getattr(chunk, "content", chunk)
+                            if token:
+                                if not chunks:
+                                    CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+                                chunks.append(token)
+                                yield token
+                    response = "".join(chunks)
+                    self._cache_response(user_message, cache_context, response)
+                self._record_reply(usage, response)
+                
+                with CHAT_STAGE_SECONDS.time(stage="memory_write"):
+                    if history.add_turn(user_message, response):
+                        self._compact_later(session_id, history)
+                    self.sessions.save(session_id, history)
         except Exception as e:
-            print(f"Error generating response: {str(e)}")
-            return "I apologize, but I'm having trouble processing your request at the moment."
+            CHAT_ERRORS.inc(type="overloaded" if isinstance(e, LLMOverloaded) else type(e).__name__)
+            raise
+        yield {"usage": usage}
     
-    def _is_skill_question(self, message):
+    async def astream_reply(self, user_message, session_id=None):
+        """Async version of stream_reply."""
+        started = time.perf_counter()
+        try:
+            history = await asyncio.to_thread(self._get_history, session_id)
+            async with history.async_lock:
+                prompt_values, usage, cache_context, response = await asyncio.to_thread(
+                    self._prepare_reply, user_message, history, session_id
+                )
+                if response is not None:
+                    CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+                    yield response
+                else:
+                    chunks = []
+                    prompt_text = self.prompt.format(**prompt_values)
+                    with CHAT_STAGE_SECONDS.time(stage="llm"):
+                        async for chunk in self.scheduler.astream(lambda: self.llm.astream(prompt_text), cost=usage["prompt_tokens"]):
+                            token = getattr(chunk, "content", chunk)
+                            if token:
+                                if not chunks:
+                                    CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+                                chunks.append(token)
+                                yield token
+                    response = "".join(chunks)
+                    await asyncio.to_thread(self._cache_response, user_message, cache_context, response)
+                self._record_reply(usage, response)
+                
+                with CHAT_STAGE_SECONDS.time(stage="memory_write"):
+                    if history.add_turn(user_message, response):
+                        self._acompact_later(session_id, history)
+                    await asyncio.to_thread(self.sessions.save, session_id, history)
+        except Exception as e:
+            CHAT_ERRORS.inc(type="overloaded" if isinstance(e, LLMOverloaded) else type(e).__name__)
+            raise
+        yield {"usage": usage}
+    
+    def _record_reply(self, usage, response):
+        """Count a finished reply and, if the model produced it, its token usage."""
+        if usage.get("intent"):
+            CHAT_REPLIES.inc(source="fast_path")
+            return
+        if usage.get("cached"):
+            CHAT_REPLIES.inc(source="cache")
+            return
+        CHAT_REPLIES.inc(source="llm")
+        usage["completion_tokens"] = count_tokens(response)
+        PROMPT_TOKENS.inc(usage["prompt_tokens"])
+        COMPLETION_TOKENS.inc(usage["completion_tokens"])
+    
+    def _get_history(self, session_id):
+        """Return the chat history for a session, starting a new one if needed."""
+        return self.sessions.get(session_id or self.sessions.new_session_id())
+    
+    def _prepare_reply(self, user_message, history, session_id):
+        """Build the prompt for a message and look for a template or cached response to it.
+        
+        Called with the session's lock held, so turns saved by another worker can be
+        loaded without overwriting a turn this process is still recording.
+        """
+        self.sessions.sync(session_id, history)
+        if self.fast_path_answers:
+            with CHAT_STAGE_SECONDS.time(stage="route"):
+                routed = self.intent_router.route(user_message)
+            if routed is not None:
+                intent, response = routed
+                return None, {"prompt_tokens": 0, "intent": intent}, None, response
+        prompt_values, usage = self._prepare_prompt(user_message, history)
+        cache_context = self._cache_context(user_message, prompt_values, history)
+        response = self._get_cached_response(user_message, cache_context, usage)
+        return prompt_values, usage, cache_context, response
+    
+    def _cache_context(self, user_message, prompt_values, history):
+        """Return the part of the prompt, besides the question itself, that shapes the answer."""
+        # The enhancers only ever prepend information to the visitor's message
+        enhancements = prompt_values["human_input"][:-len(user_message)]
+        context = self.prompt_prefix.version + "\n" + prompt_values["resume_context"] + "\n" + enhancements
+        if history.turns:
+            # A follow-up like "Can you elaborate?" is about the previous answer, so it
+            # may only reuse responses given after that same exchange
+            context += "\n" + format_turns(history.turns[-1:])
+        return context
+    
+    def _get_cached_response(self, user_message, cache_context, usage):
+        """Look up a cached response, marking the usage as cached on a hit."""
+        if self.response_cache is None:
+            return None
+        with CHAT_STAGE_SECONDS.time(stage="cache_lookup"):
+            response = self.response_cache.get(user_message, cache_context)
+        usage["cached"] = response is not None
+        return response
+    
+    def _cache_response(self, user_message, cache_context, response):
+        """Store a fresh model response in the cache."""
+        if self.response_cache is not None:
+            self.response_cache.set(user_message, cache_context, response)
+    
+    def _prepare_prompt(self, user_message, history):
+        """Build the prompt values for a message and measure their token usage."""
+        prompt_input = user_message
+        with CHAT_STAGE_SECONDS.time(stage="classify"):
+            # Tokenize the message once for every keyword, skill and repository lookup
+            analysis = self.skill_index.analyze(user_message)
+            is_skill_question = self._is_skill_question(analysis)
+            is_github_question = self._is_github_question(analysis)
+        
+        with CHAT_STAGE_SECONDS.time(stage="enhance"):
+            # Enhance the prompt with skill inference information for questions about skills or technologies
+            if is_skill_question:
+                prompt_input = self._enhance_prompt_with_skills(prompt_input, analysis)
+            
+            # Enhance the prompt with GitHub repository information for questions about projects
+            if is_github_question:
+                prompt_input = self._enhance_prompt_with_github(prompt_input, analysis)
+        
+        # Only the resume chunks relevant to the visitor's question go into the prompt
+        with CHAT_STAGE_SECONDS.time(stage="retrieve"):
+            resume_context = self.resume_index.format_context(user_message, self.retrieval_top_k)
+        prompt_values = {
+            "resume_context": resume_context,
+            "chat_history": history.render(),
+            "human_input": prompt_input
+        }
+        # The prefix is counted once when it's built; only the per-question part is counted here
+        prefix = self.prompt_prefix
+        prompt_text = self.prompt.format(**prompt_values)
+        usage = {
+            "prompt_tokens": prefix.tokens + count_tokens(prompt_text[len(prefix.text):]),
+            "prefix_tokens": prefix.tokens,
+            "prompt_version": prefix.version,
+            "history_tokens": count_tokens(prompt_values["chat_history"]),
+            "summarized_turns": history.summarized_turns
+        }
+        return prompt_values, usage
+    
+    def _is_skill_question(self, analysis):
         """Check if the question is about skills or technologies."""
-        skill_keywords = ["skill", "technology", "programming", "language", "framework", "tool", "software", "platform", "experience with", "knowledge of", "proficient in", "familiar with", "know", "use", "work with", "expertise", "proficiency"]
-        return any(keyword in message.lower() for keyword in skill_keywords)
+        return analysis.mentions_any(SKILL_KEYWORDS)
     
-    def _is_github_question(self, message):
+    def _is_github_question(self, analysis):
         """Check if the question is about GitHub repositories or projects."""
-        github_keywords = ["github", "repository", "repo", "project", "code", "programming", "work", "portfolio", "build", "created", "developed"]
-        return any(keyword in message.lower() for keyword in github_keywords)
+        return analysis.mentions_any(GITHUB_KEYWORDS)
     
-    def _enhance_prompt_with_skills(self, message):
+    def _enhance_prompt_with_skills(self, message, analysis):
         """Enhance the prompt with skill inference information."""
-        # Extract potential skills mentioned in the question
-        mentioned_skills = []
-        for skill in self.skill_database["skills"].keys():
-            if skill.lower() in message.lower():
-                mentioned_skills.append(skill)
-        
-        # If no skills are explicitly mentioned, try to infer from the question
-        if not mentioned_skills:
-            # Check for common technology names in the question
-            for skill in self.skill_database["skills"].keys():
-                if skill.lower() in message.lower():
-                    mentioned_skills.append(skill)
+        # Look up the skills mentioned in the question, including aliases like "k8s"
+        mentioned_skills = self.skill_index.find_skills(analysis)
         
         # Add skill information to the prompt
         enhanced_message = message
@@ -314,15 +653,13 @@ Remember to:
         
         return enhanced_message
     
-    def _enhance_prompt_with_github(self, message):
+    def _enhance_prompt_with_github(self, message, analysis):
         """Enhance the prompt with GitHub repository information."""
         # If we have GitHub repositories, add relevant information
         if self.github_repos:
-            # Extract potential repository names mentioned in the question
-            mentioned_repos = []
-            for repo in self.github_repos:
-                if repo["name"].lower() in message.lower():
-                    mentioned_repos.append(repo)
+            # Look up the repository names mentioned in the question
+            repos_by_name = {repo["name"]: repo for repo in self.github_repos}
+            mentioned_repos = [repos_by_name[name] for name in self.skill_index.find_repos(analysis)]
             
             # If specific repositories are mentioned, provide details about them
             if mentioned_repos:
@@ -334,7 +671,7 @@ Remember to:
                 return enhanced_message
             
             # If no specific repositories are mentioned but it's a general GitHub question
-            elif "github" in message.lower() or "repository" in message.lower() or "project" in message.lower():
+            elif analysis.mentions_any(GENERAL_GITHUB_KEYWORDS):
                 # Get top repositories by stars
                 top_repos = sorted(self.github_repos, key=lambda x: x["stars"], reverse=True)[:3]
                 repo_summary = "Here are some of my notable GitHub repositories: "
@@ -344,4 +681,4 @@ Remember to:
                 enhanced_message = repo_summary + "\n\n" + message
                 return enhanced_message
         
-        return message 
\ No newline at end of file
+        return message
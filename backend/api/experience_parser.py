@@ -0,0 +1,131 @@
+# Headings that open each kind of experience section
+PROFESSIONAL_HEADINGS = ('professional experience', 'work experience', 'employment history')
+OTHER_HEADINGS = ('other experience', 'additional experience', 'volunteer experience')
+
+def parse_entry_heading(line):
+    """Split an entry heading like "Engineer at Company (2020 - 2021)" into its parts."""
+    separator = ' at ' if ' at ' in line else ' - '
+    position, rest = line.split(separator, 1)
+    if ' (' in rest:
+        company, duration = rest.split(' (', 1)
+        duration = duration.rstrip(')')
+    else:
+        company = rest
+        duration = None
+    return {
+        'position': position.strip(),
+        'company': company.strip(),
+        'duration': duration,
+        'description': '',
+        'skills': []
+    }
+
+def parse_dated_entry(block):
+    """Split a dated entry block like "Company: Role | Aug 2021 - Jul 2023" into its parts."""
+    heading = block['text'].replace(block['dates'], '').strip(' |,-–')
+    if ': ' in heading:
+        company, position = heading.split(': ', 1)
+    elif ' at ' in heading:
+        position, company = heading.split(' at ', 1)
+    else:
+        company, position = heading, ''
+    return {
+        'position': ' '.join(position.strip(' |').split()),
+        'company': ' '.join(company.strip(' |').split()),
+        'duration': block['dates'],
+        'description': '',
+        'skills': []
+    }
+
+def attach_skills(entries, extract_skills_from_texts):
+    """Extract skills from every entry's description in one batch."""
+    described = [entry for entry in entries if entry['description']]
+    batch_skills = extract_skills_from_texts([entry['description'] for entry in described])
+    for entry, skills in zip(described, batch_skills):
+        entry['skills'] = skills
+
+def parse_experience_blocks(blocks, extract_skills_from_texts=None):
+    """Parse experience entries from the typed blocks of ResumeParser.
+    
+    Each dated block under an experience heading opens an entry, and the bullets
+    and paragraphs after it become its description.
+    """
+    professional_experience = []
+    other_experience = []
+    current_section = None
+    current_experience = None
+    
+    for block in blocks:
+        if block['type'] == 'heading':
+            heading = block['text'].lower()
+            if heading == 'experience' or heading.startswith(PROFESSIONAL_HEADINGS):
+                current_section = professional_experience
+            elif heading.startswith(OTHER_HEADINGS):
+                current_section = other_experience
+            else:
+                current_section = None
+            current_experience = None
+        elif current_section is None:
+            continue
+        elif block['type'] == 'date_range':
+            current_experience = parse_dated_entry(block)
+            current_section.append(current_experience)
+        elif current_experience:
+            current_experience['description'] += block['text'] + ' '
+    
+    if extract_skills_from_texts:
+        attach_skills(professional_experience + other_experience, extract_skills_from_texts)
+    
+    return {
+        'professional_experience': professional_experience,
+        'other_experience': other_experience
+    }
+
+def parse_experience(resume_text, extract_skills_from_texts=None):
+    """Parse professional and other experience entries out of the resume text.
+    
+    If given, extract_skills_from_texts is called once with every entry's description.
+    """
+    professional_experience = []
+    other_experience = []
+    current_experience = None
+    current_section = None
+    
+    # Split resume into sections
+    for section in resume_text.split('\n\n'):
+        lines = section.strip().split('\n')
+        
+        # Check if this is a professional experience section
+        if any(line.lower().startswith(PROFESSIONAL_HEADINGS) for line in lines):
+            current_section = professional_experience
+        elif any(line.lower().startswith(OTHER_HEADINGS) for line in lines):
+            current_section = other_experience
+        else:
+            continue
+        
+        # Process each experience entry
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            
+            # Check for new experience entry (usually starts with company name or position)
+            if line[0].isupper() and (' at ' in line or ' - ' in line):
+                if current_experience:
+                    current_section.append(current_experience)
+                current_experience = parse_entry_heading(line)
+            # Collect description text
+            elif current_experience:
+                current_experience['description'] += line + ' '
+    
+    # Add the last experience if exists
+    if current_experience:
+        current_section.append(current_experience)
+    
+    if extract_skills_from_texts:
+        attach_skills(professional_experience + other_experience, extract_skills_from_texts)
+    
+    return {
+        'professional_experience': professional_experience,
+        'other_experience': other_experience
+    }
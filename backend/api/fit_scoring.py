@@ -0,0 +1,161 @@
+import re
+import numpy as np
+
+from skill_index import DEFAULT_ALIASES, TOKEN_PATTERN, tokenize
+from skill_matcher import SOFT_SKILLS, TECHNICAL_SKILLS
+
+# How much each kind of evidence in the skill database counts towards a match
+CONFIDENCE_WEIGHTS = {"high": 1.0, "medium": 0.7, "low": 0.4}
+
+# Skill names that are also everyday words, only matched when written exactly like this
+CASE_SENSITIVE_TERMS = frozenset(["R", "Go", "LESS"])
+_CASE_SENSITIVE_FORMS = {term.lower(): term for term in CASE_SENSITIVE_TERMS}
+
+# How vocabulary terms that aren't simply capitalized are written in results
+DISPLAY_NAMES = {
+    "c++": "C++", "javascript": "JavaScript", "typescript": "TypeScript", "node.js": "Node.js", "php": "PHP",
+    "sql": "SQL", "mysql": "MySQL", "postgresql": "PostgreSQL", "mongodb": "MongoDB", "sqlite": "SQLite",
+    "aws": "AWS", "github": "GitHub", "gitlab": "GitLab", "nlp": "NLP", "ai": "AI", "html": "HTML", "css": "CSS",
+    "less": "LESS", "material-ui": "Material-UI", "jquery": "jQuery", "rest": "REST", "graphql": "GraphQL",
+    "api": "API", "soa": "SOA", "websocket": "WebSocket", "grpc": "gRPC", "macos": "macOS", "ios": "iOS",
+    "devops": "DevOps", "ci/cd": "CI/CD", "tdd": "TDD", "bdd": "BDD"
+}
+
+def _normalize(name):
+    return ' '.join(tokenize(name))
+
+def _alternation(terms):
+    return '(?<!\\w)(?:' + '|'.join(re.escape(term) for term in terms) + ')(?!\\w)'
+
+def skill_weight(details):
+    """Weight of a skill database entry: its inference score if it has one, otherwise its confidence."""
+    if "score" in details:
+        return float(details["score"])
+    return CONFIDENCE_WEIGHTS.get(details.get("confidence"), 0.0)
+
+class FitScorer:
+    """Scores job postings against a candidate's skills using a sparse posting-by-skill matrix.
+
+    Columns are the candidate's skills plus the common skill vocabulary, so
+    postings can ask for skills the candidate lacks. Each posting is matched
+    in one regex pass and scored with a few NumPy operations over the whole batch.
+    """
+
+    def __init__(self, skills, vocabulary=TECHNICAL_SKILLS + SOFT_SKILLS, aliases=None):
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        # Shorthand like "vue" or "gcp" shares a column with the skill it stands for
+        self._canonical = {_normalize(alias): name for alias, name in aliases.items()}
+        self.columns = []
+        self._columns_by_key = {}
+        weights = []
+        inferred = []
+
+        for name, details in skills.items():
+            self._add_column(name, weights, inferred, skill_weight(details), details.get("source") == "inferred")
+        for name in [*vocabulary, *sorted(CASE_SENSITIVE_TERMS)]:
+            display_name = DISPLAY_NAMES.get(name, name.capitalize() if name.islower() else name)
+            self._add_column(display_name, weights, inferred, 0.0, False)
+
+        # Every way of writing a column mapped to its index. Terms are found by set
+        # intersection with the posting's tokens, which is much faster than one big
+        # regex; multi-word terms like "machine learning" or ci/cd are looked up only
+        # when the posting contains their first token
+        self._tokens = {}
+        self._phrases = {}
+        self._exact_terms = {}
+        for column, name in enumerate(self.columns):
+            self._add_term(name, column)
+        for alias in aliases:
+            column = self.column(alias)
+            if column is not None:
+                self._add_term(alias, column)
+
+        self.exact_pattern = re.compile(_alternation(self._exact_terms)) if self._exact_terms else None
+        self._exact_tokens = frozenset(term.lower() for term in self._exact_terms)
+
+        self.weights = np.array(weights, dtype=np.float32)
+        self.inferred = np.array(inferred, dtype=bool)
+
+    def column(self, name):
+        """Return the column index of a skill or one of its aliases, or None if it has none."""
+        key = _normalize(name)
+        return self._columns_by_key.get(_normalize(self._canonical.get(key, key)))
+
+    def _add_column(self, name, weights, inferred, weight, is_inferred):
+        key = _normalize(name)
+        if not key:
+            return
+        if key in self._canonical:
+            name = self._canonical[key]
+            key = _normalize(name)
+        column = self._columns_by_key.get(key)
+        if column is None:
+            self._columns_by_key[key] = len(self.columns)
+            self.columns.append(name)
+            weights.append(weight)
+            inferred.append(is_inferred)
+        elif weight > weights[column]:
+            # The same skill under another spelling, e.g. a GitHub topic; keep the strongest evidence
+            weights[column] = weight
+            inferred[column] = is_inferred
+
+    def _add_term(self, term, column):
+        lowered = term.lower()
+        if lowered in _CASE_SENSITIVE_FORMS:
+            self._exact_terms.setdefault(_CASE_SENSITIVE_FORMS[lowered], column)
+        elif TOKEN_PATTERN.fullmatch(lowered):
+            self._tokens.setdefault(lowered, column)
+        else:
+            first_token = tokenize(lowered)[0]
+            self._phrases.setdefault(first_token, {}).setdefault(lowered, column)
+
+    def match(self, text):
+        """Return the sorted column indices of the skills a posting mentions."""
+        lowered = text.lower()
+        tokens = set(TOKEN_PATTERN.findall(lowered))
+        columns = {self._tokens[token] for token in self._tokens.keys() & tokens}
+        for first_token in self._phrases.keys() & tokens:
+            columns.update(column for phrase, column in self._phrases[first_token].items() if phrase in lowered)
+        if not self._exact_tokens.isdisjoint(tokens):
+            columns.update(self._exact_terms[found.group()] for found in self.exact_pattern.finditer(text))
+        return sorted(columns)
+
+    def matrix(self, texts):
+        """Build the postings' skill matrix in CSR form, returning (indptr, indices)."""
+        rows = [self.match(text) for text in texts]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        indices = np.fromiter((column for row in rows for column in row), dtype=np.int64, count=int(indptr[-1]))
+        return indptr, indices
+
+    def score(self, texts):
+        """Score every posting, returning (scores, indptr, indices).
+
+        A posting's score is the mean weight of the skills it asks for, from 0
+        for no overlap to 1 when the resume shows all of them with high confidence.
+        """
+        indptr, indices = self.matrix(texts)
+        required = np.diff(indptr)
+        row_of = np.repeat(np.arange(len(texts)), required)
+        matched_weight = np.bincount(row_of, weights=self.weights[indices], minlength=len(texts))
+        scores = np.divide(matched_weight, required, out=np.zeros(len(texts)), where=required > 0)
+        return scores, indptr, indices
+
+    def rank(self, texts, top=None, min_score=0.0):
+        """Rank postings by fit, best first, with the skills each one matched and missed."""
+        scores, indptr, indices = self.score(texts)
+        order = np.argsort(-scores, kind='stable')
+        order = order[scores[order] >= min_score][:top]
+
+        results = []
+        for row in order:
+            columns = indices[indptr[row]:indptr[row + 1]]
+            held = self.weights[columns] > 0
+            results.append({
+                'index': int(row),
+                'score': round(float(scores[row]), 3),
+                'matched': [self.columns[column] for column in columns[held & ~self.inferred[columns]]],
+                'inferred': [self.columns[column] for column in columns[held & self.inferred[columns]]],
+                'missing': [self.columns[column] for column in columns[~held]]
+            })
+        return results
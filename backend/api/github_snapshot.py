@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+GITHUB_API_URL = "https://api.github.com"
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def repo_info(repo):
+    """Keep the fields of a GitHub API repository that the chatbot uses."""
+    return {
+        "name": repo.get("name", ""),
+        "description": repo.get("description", ""),
+        "url": repo.get("html_url", ""),
+        "topics": repo.get("topics", []),
+        "language": repo.get("language", ""),
+        "stars": repo.get("stargazers_count", 0),
+        "forks": repo.get("forks_count", 0)
+    }
+
+class GitHubSnapshot:
+    """A user's GitHub repositories served from disk and refreshed in the background.
+
+    Reads never touch the network. The snapshot is loaded from its file, or from a
+    fixture when there is none yet, and a refresher thread keeps it current with
+    conditional requests so unchanged pages cost no rate limit.
+    """
+
+    def __init__(self, username, path=None, fixture_path=None, refresh_interval=3600,
+                 token=None, offline=False, on_change=None, timeout=10):
+        self.username = username
+        if path is None:
+            cache_dir = os.getenv("ARTIFACT_CACHE_DIR") or os.path.dirname(os.path.abspath(__file__))
+            path = os.path.join(cache_dir, f"github-{username}.snapshot.json")
+        self.path = path
+        self.fixture_path = fixture_path or os.path.join(FIXTURE_DIR, f"github-{username}.json")
+        self.refresh_interval = refresh_interval
+        self.token = token
+        self.offline = offline
+        self.on_change = on_change
+        self.timeout = timeout
+
+        # Raw API pages with their ETags, so each page can be revalidated on its own
+        self.pages = []
+        self.fetched_at = 0
+        self._repos = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._load()
+
+    @property
+    def repos(self):
+        return self._repos
+
+    def _load(self):
+        """Load the saved snapshot, falling back to the bundled fixture."""
+        for path in (self.path, self.fixture_path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Error reading GitHub snapshot {path}: {str(e)}")
+                continue
+            self.pages = data.get("pages", [])
+            self.fetched_at = data.get("fetched_at", 0)
+            self._repos = data.get("repos", [])
+            return
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({
+                    "username": self.username,
+                    "fetched_at": self.fetched_at,
+                    "pages": self.pages,
+                    "repos": self._repos
+                }, file)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error writing GitHub snapshot: {str(e)}")
+
+    def _headers(self):
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def refresh(self):
+        """Revalidate every page of the repository list, returning True if it changed."""
+        with self._lock:
+            url = f"{GITHUB_API_URL}/users/{self.username}/repos?per_page=100"
+            pages = []
+            changed = False
+            while url:
+                # Send the ETag we saved for this page so an unchanged page comes back as a bodiless 304
+                previous = self.pages[len(pages)] if len(pages) < len(self.pages) else None
+                headers = self._headers()
+                if previous and previous.get("url") == url and previous.get("etag"):
+                    headers["If-None-Match"] = previous["etag"]
+                response = requests.get(url, headers=headers, timeout=self.timeout)
+
+                if response.status_code == 304:
+                    page = previous
+                elif response.status_code == 200:
+                    page = {
+                        "url": url,
+                        "etag": response.headers.get("ETag"),
+                        "next": response.links.get("next", {}).get("url"),
+                        "repos": response.json()
+                    }
+                    changed = True
+                else:
+                    raise RuntimeError(f"GitHub returned {response.status_code} for {url}")
+                pages.append(page)
+                url = page.get("next")
+
+            # Repositories may have been deleted, leaving fewer pages than before
+            changed = changed or len(pages) != len(self.pages)
+            self.pages = pages
+            self.fetched_at = time.time()
+            if changed:
+                self._repos = [repo_info(repo) for page in pages for repo in page["repos"]]
+            self._save()
+
+        if changed and self.on_change is not None:
+            self.on_change()
+        return changed
+
+    def is_stale(self):
+        return time.time() - self.fetched_at >= self.refresh_interval
+
+    def start_refresh(self):
+        """Refresh the snapshot on a daemon thread now if it is stale, then periodically."""
+        if self.offline or not self.refresh_interval or self._thread is not None:
+            return None
+
+        def run():
+            while not self._stopped.is_set():
+                if self.is_stale():
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        # Keep serving the last snapshot and try again next interval
+                        print(f"Error refreshing GitHub snapshot: {str(e)}")
+                self._stopped.wait(self.refresh_interval)
+
+        self._thread = threading.Thread(target=run, name="github-refresh", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the background refresher."""
+        self._stopped.set()
+
+def create_github_snapshot(username, on_change=None):
+    """Build the snapshot for a user, configured by the environment."""
+    return GitHubSnapshot(
+        username,
+        refresh_interval=int(os.getenv("GITHUB_REFRESH_SECONDS", 3600)),
+        token=os.getenv("GITHUB_TOKEN") or None,
+        offline=os.getenv("GITHUB_OFFLINE", "0") == "1",
+        on_change=on_change
+    )
+
+if __name__ == "__main__":
+    # Refresh a snapshot ahead of deploying, e.g. `python github_snapshot.py naveenaduri`
+    import sys
+    snapshot = create_github_snapshot(sys.argv[1] if len(sys.argv) > 1 else "naveenaduri")
+    snapshot.refresh()
+    print(f"Saved {len(snapshot.repos)} repositories to {snapshot.path}")
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+from metrics import log_error
+
+try:
+    import tiktoken
+    _encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+except Exception:
+    _encoding = None
+
+def count_tokens(text):
+    """Count the tokens the model will see for the given text."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Rough estimate of four characters per token when tiktoken is unavailable
+    return max(1, len(text) // 4)
+
+def format_turns(turns, human_prefix="Human", ai_prefix="AI"):
+    """Render (human, ai) turns as a plain-text transcript."""
+    return "\n".join(f"{human_prefix}: {human}\n{ai_prefix}: {ai}" for human, ai in turns)
+
+class ChatHistory:
+    """Conversation history that keeps recent turns verbatim and summarizes the rest.
+
+    Turns pushed out of the window wait in a backlog until compact() folds them
+    into the summary, so the model call for it can run after the reply has been
+    sent. Turns are pushed out several at a time, which keeps that to one
+    summary call every few turns. Until then they are rendered verbatim.
+    """
+
+    def __init__(self, summarize, max_turns=4, token_budget=1500, asummarize=None):
+        # summarize(summary, new_lines) returns the updated running summary;
+        # asummarize is its coroutine counterpart for the async server
+        self.summarize = summarize
+        self.asummarize = asummarize
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+
+        self.turns = []
+        self.unsummarized = []
+        self.summary = ""
+        self.summarized_turns = 0
+
+        # Serialize turns within a session so concurrent requests don't interleave
+        self.lock = threading.Lock()
+        self.async_lock = asyncio.Lock()
+
+    def render(self):
+        """Render the history for the prompt's chat_history slot."""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation: {self.summary}")
+        if self.unsummarized or self.turns:
+            parts.append(format_turns(self.unsummarized + self.turns))
+        return "\n".join(parts)
+
+    def token_count(self):
+        """Number of tokens the rendered history takes up."""
+        return count_tokens(self.render())
+
+    def add_turn(self, human, ai):
+        """Record a finished exchange, returning True if the history now needs compact()."""
+        self.turns.append((human, ai))
+        if len(self.turns) > self.max_turns or (len(self.turns) > 1 and self._window_tokens() > self.token_budget):
+            # Evict down to half the window and budget, so the next summary call is a few turns away
+            keep = max(1, self.max_turns // 2)
+            while len(self.turns) > keep or (len(self.turns) > 1 and self._window_tokens() > self.token_budget // 2):
+                self.unsummarized.append(self.turns.pop(0))
+        return bool(self.unsummarized)
+
+    def compact(self):
+        """Fold the evicted turns into the running summary. Call with the lock held."""
+        if not self.unsummarized:
+            return
+        evicted = list(self.unsummarized)
+        try:
+            summary = self.summarize(self.summary, format_turns(evicted))
+        except Exception as e:
+            # Keep the turns; they are rendered verbatim and summarized on the next try
+            log_error(f"Error summarizing chat history: {str(e)}")
+            return
+        self._apply_summary(summary, evicted)
+
+    async def acompact(self):
+        """Async version of compact. Call with the async lock held."""
+        if not self.unsummarized:
+            return
+        evicted = list(self.unsummarized)
+        try:
+            if self.asummarize is not None:
+                summary = await self.asummarize(self.summary, format_turns(evicted))
+            else:
+                summary = await asyncio.to_thread(self.summarize, self.summary, format_turns(evicted))
+        except Exception as e:
+            log_error(f"Error summarizing chat history: {str(e)}")
+            return
+        self._apply_summary(summary, evicted)
+
+    def to_dict(self):
+        """Return the conversation state for storage."""
+        return {
+            'turns': [list(turn) for turn in self.turns],
+            'unsummarized': [list(turn) for turn in self.unsummarized],
+            'summary': self.summary,
+            'summarized_turns': self.summarized_turns
+        }
+
+    def restore(self, data):
+        """Replace the conversation state with one returned by to_dict."""
+        self.turns = [tuple(turn) for turn in data['turns']]
+        self.unsummarized = [tuple(turn) for turn in data.get('unsummarized', [])]
+        self.summary = data['summary']
+        self.summarized_turns = data['summarized_turns']
+
+    def clear(self):
+        """Forget the whole conversation."""
+        self.turns = []
+        self.unsummarized = []
+        self.summary = ""
+        self.summarized_turns = 0
+
+    def _apply_summary(self, summary, evicted):
+        self.summary = summary
+        del self.unsummarized[:len(evicted)]
+        self.summarized_turns += len(evicted)
+
+    def _window_tokens(self):
+        """Tokens used by the summary and the verbatim turns in the window."""
+        return count_tokens(self.summary) + count_tokens(format_turns(self.turns))
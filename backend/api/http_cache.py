@@ -0,0 +1,19 @@
+import hashlib
+import json
+from flask import Response, request
+
+class CachedPayload:
+    """A JSON response body serialized once and identified by a content hash."""
+
+    def __init__(self, data):
+        self.data = data
+        self.body = json.dumps(data, sort_keys=True).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+def cached_json_response(payload, max_age=300):
+    """Serve a cached payload, answering conditional requests with 304 Not Modified."""
+    response = Response(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
@@ -0,0 +1,120 @@
+# Bulk resume ingestion, run with `python ingest.py resumes/ -o resumes.jsonl`.
+# Resume PDFs are parsed across a pool of worker processes and written as one
+# JSON record per line. The output doubles as the checkpoint: rerunning the same
+# command skips every resume already written and appends the rest.
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import skill_matcher
+from artifact_cache import file_hash
+from experience_parser import parse_experience_blocks
+from resume_parser import ResumeParser
+
+# Set in each worker process by init_worker
+_nlp = None
+
+def init_worker(fast):
+    """Load spaCy once per worker process instead of once per resume."""
+    global _nlp
+    if not fast:
+        import spacy
+        _nlp = spacy.load("en_core_web_sm", disable=skill_matcher.UNUSED_SPACY_COMPONENTS)
+
+def extract_skills_from_texts(texts):
+    return skill_matcher.extract_skills_from_texts(texts, _nlp)
+
+def ingest_file(path):
+    """Parse one resume into a JSON-serializable record, capturing any error in the record."""
+    started = time.perf_counter()
+    try:
+        resume_parser = ResumeParser(path, use_cache=False)
+        if not resume_parser.resume_text:
+            raise ValueError('No text could be extracted from the PDF')
+        skills = extract_skills_from_texts([resume_parser.resume_text])[0]
+        record = {
+            'path': path,
+            'status': 'ok',
+            'file_name': resume_parser.file_name,
+            'sha256': file_hash(path),
+            'pages': max((block['page'] for block in resume_parser.blocks), default=0),
+            'skills': skills,
+            'sections': [heading for heading, _ in resume_parser.sections],
+            'experience': parse_experience_blocks(resume_parser.blocks, extract_skills_from_texts),
+            'text': resume_parser.resume_text
+        }
+    except Exception as e:
+        record = {'path': path, 'status': 'error', 'error': f'{type(e).__name__}: {str(e)}'}
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+def find_pdfs(paths):
+    """Expand files and directories into a sorted list of PDF paths."""
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                pdfs += [os.path.join(root, name) for name in files if name.lower().endswith('.pdf')]
+        else:
+            pdfs.append(path)
+    return sorted(pdfs)
+
+def load_checkpoint(output_path, retry_errors=False):
+    """Return the paths already recorded in an earlier run's output."""
+    done = set()
+    try:
+        with open(output_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write can leave a partial last line
+                    continue
+                if record.get('status') == 'ok' or not retry_errors:
+                    done.add(record['path'])
+    except FileNotFoundError:
+        pass
+    return done
+
+def ingest(paths, output_path, workers=None, fast=False, retry_errors=False, chunksize=1, progress=sys.stderr):
+    """Ingest every PDF under the given paths, returning (succeeded, failed) counts."""
+    done = load_checkpoint(output_path, retry_errors)
+    pending = [path for path in find_pdfs(paths) if path not in done]
+    if done:
+        print(f"Skipping {len(done)} resumes already in {output_path}", file=progress)
+
+    succeeded = failed = 0
+    started = time.perf_counter()
+    with open(output_path, 'a', encoding='utf-8') as output, \
+            multiprocessing.Pool(workers or os.cpu_count(), init_worker, (fast,)) as pool:
+        # Results are written as soon as any worker finishes, so one slow PDF doesn't hold up the rest
+        for count, record in enumerate(pool.imap_unordered(ingest_file, pending, chunksize), start=1):
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            if record['status'] == 'ok':
+                succeeded += 1
+            else:
+                failed += 1
+            rate = count / (time.perf_counter() - started)
+            print(f"[{count}/{len(pending)}] {record['status']:5} {record['path']} ({rate:.1f} resumes/s)", file=progress)
+    return succeeded, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse resume PDFs in parallel into a JSONL file.')
+    parser.add_argument('paths', nargs='+', help='PDF files or directories to search for PDFs')
+    parser.add_argument('-o', '--output', required=True, help='JSONL file to append records to; also the checkpoint')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    parser.add_argument('--fast', action='store_true', help='Match the skill vocabulary only, without spaCy')
+    parser.add_argument('--retry-errors', action='store_true', help='Parse resumes that failed in an earlier run again')
+    parser.add_argument('--chunksize', type=int, default=1, help='Resumes handed to a worker at a time')
+    args = parser.parse_args(argv)
+
+    succeeded, failed = ingest(args.paths, args.output, args.workers, args.fast, args.retry_errors, args.chunksize)
+    print(f"Ingested {succeeded} resumes, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import re
+
+from skill_index import tokenize
+
+# Questions with these words want an explanation, not a lookup, so they go to the model
+OPEN_ENDED_WORDS = frozenset([
+    "how", "why", "describe", "explain", "tell", "compare", "difference", "example", "examples",
+    "approach", "think", "opinion", "favorite", "favourite", "best", "strongest", "weakest",
+    "challenge", "challenges", "elaborate", "detail", "details", "walk", "teach", "learn"
+])
+
+# Openings of a yes/no question like "Do you know Docker?"
+YES_NO_OPENINGS = frozenset(["do", "did", "have", "are", "can", "could", "is", "does", "any"])
+SKILL_QUESTION_WORDS = frozenset([
+    "know", "knowledge", "use", "used", "using", "experience", "experienced", "familiar", "proficient",
+    "worked", "work", "skill", "skills", "comfortable", "code", "program", "write"
+])
+
+# Follow-up questions folded into a yes/no skill question need the model
+QUESTION_WORDS = frozenset(["what", "which", "where", "who", "when"])
+
+REPO_WORDS = frozenset(["github", "repo", "repos", "repository", "repositories", "projects"])
+LIST_WORDS = frozenset(["list", "what", "which", "show", "all", "your"])
+
+CONTACT_PHRASES = frozenset([
+    "contact you", "contact info", "contact information", "contact details", "your contact", "reach you",
+    "get in touch", "your email", "email address", "email you", "your linkedin", "linkedin profile"
+])
+
+DATE_WORDS = frozenset(["when", "how long", "dates", "years", "start", "started", "join", "joined", "leave", "left", "period"])
+
+# Longest messages still treated as a quick lookup, and as a request for the repository list
+MAX_LOOKUP_TOKENS = 16
+MAX_LIST_TOKENS = 8
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+LINKEDIN_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?linkedin\.com/in/[\w-]+/?')
+# A trailing "City, Region" that the resume layout runs into the job title
+LOCATION_SUFFIX = re.compile(r'\s+[A-Z][A-Za-z]+,\s*[A-Z][A-Za-z ]*$')
+
+def extract_contact_info(text):
+    """Find the email address and LinkedIn profile in a resume's text."""
+    email = EMAIL_PATTERN.search(text)
+    linkedin = LINKEDIN_PATTERN.search(text)
+    return {
+        'email': email.group() if email else None,
+        'linkedin': linkedin.group() if linkedin else None
+    }
+
+def _ngrams(tokens, max_n):
+    return {' '.join(tokens[start:start + n]) for n in range(1, max_n + 1) for start in range(len(tokens) - n + 1)}
+
+class IntentRouter:
+    """Answers factual questions about the candidate from templates, without the model.
+
+    Every answer is rendered once when the router is built, so routing a message
+    is a tokenization and a few set lookups. Anything that isn't clearly one of
+    the supported lookups returns None and goes to the model as before.
+    """
+
+    def __init__(self, skills, fit_scorer, repos=(), experience=(), resume_text='', github_username=None):
+        self.fit_scorer = fit_scorer
+        # "github" is in the skill vocabulary but in a question it asks about repositories
+        self.ignored_columns = frozenset(
+            column for column, name in enumerate(fit_scorer.columns) if name.lower() in REPO_WORDS
+        )
+
+        # One sentence per skill column the candidate has, or None to leave the question to the model
+        details_by_column = {fit_scorer.column(name): details for name, details in skills.items()}
+        self.skill_answers = [
+            self._skill_answer(name, details_by_column.get(column))
+            for column, name in enumerate(fit_scorer.columns)
+        ]
+
+        self.repo_answer = None
+        if repos:
+            ranked = sorted(repos, key=lambda repo: repo["stars"], reverse=True)
+            lines = [
+                f"- {repo['name']}: {repo['description'] or 'No description'} ({repo['language'] or 'various languages'}) {repo['url']}"
+                for repo in ranked
+            ]
+            self.repo_answer = "Here are my public GitHub repositories:\n" + "\n".join(lines)
+
+        contact = extract_contact_info(resume_text)
+        contact_lines = []
+        if contact['email']:
+            contact_lines.append(f"- Email: {contact['email']}")
+        if contact['linkedin']:
+            contact_lines.append(f"- LinkedIn: {contact['linkedin']}")
+        if github_username:
+            contact_lines.append(f"- GitHub: https://github.com/{github_username}")
+        self.contact_answer = "You can reach me here:\n" + "\n".join(contact_lines) if contact_lines else None
+
+        # Employment dates keyed by the normalized company name
+        self.company_answers = {}
+        self.max_company_tokens = 1
+        for entry in experience:
+            key = ' '.join(tokenize(entry['company']))
+            if not key or not entry.get('duration'):
+                continue
+            role = LOCATION_SUFFIX.sub('', entry['position'])
+            sentence = f"I was {role} at {entry['company']} ({entry['duration']})." if role else \
+                f"I worked at {entry['company']} ({entry['duration']})."
+            self.company_answers.setdefault(key, []).append(sentence)
+            self.max_company_tokens = max(self.max_company_tokens, key.count(' ') + 1)
+
+    @staticmethod
+    def _skill_answer(name, details):
+        source = details["source"] if details else None
+        projects = ', '.join(details["projects"]) if details else ''
+        if source == "both":
+            return f"Yes, {name} is on my resume and I've used it in my GitHub projects: {projects}."
+        if source == "resume":
+            return f"Yes, {name} is one of the skills on my resume."
+        if source == "github":
+            return f"Yes, I've used {name} in my GitHub projects: {projects}."
+        if details is None:
+            # The skill may still be there under another name, which the model can judge better
+            return None
+        return (f"I haven't listed {name} on my resume, but I'm comfortable picking it up given my "
+                f"experience with {details.get('inferred_from', 'related technologies')}.")
+
+    def route(self, message):
+        """Return (intent, answer) for a factual lookup, or None if the model should answer."""
+        tokens = tokenize(message)
+        if not tokens or len(tokens) > MAX_LOOKUP_TOKENS:
+            return None
+        words = set(tokens)
+        ngrams = _ngrams(tokens, max(3, self.max_company_tokens))
+
+        if self.contact_answer and not ngrams.isdisjoint(CONTACT_PHRASES):
+            return "contact", self.contact_answer
+        open_ended = words & OPEN_ENDED_WORDS
+        if open_ended and not (open_ended == {"how"} and "how long" in ngrams):
+            return None
+
+        companies = [key for key in self.company_answers if key in ngrams]
+        if companies and not ngrams.isdisjoint(DATE_WORDS):
+            return "experience_dates", " ".join(sentence for key in companies for sentence in self.company_answers[key])
+        if "how long" in ngrams:
+            return None
+
+        # A question that names a company, e.g. "did you use Java at Acme?", needs the model
+        if companies:
+            return None
+
+        columns = [column for column in self.fit_scorer.match(message) if column not in self.ignored_columns]
+        if columns:
+            answers = [self.skill_answers[column] for column in columns]
+            if (tokens[0] in YES_NO_OPENINGS and not words.isdisjoint(SKILL_QUESTION_WORDS)
+                    and words.isdisjoint(QUESTION_WORDS) and None not in answers):
+                return "skill_lookup", " ".join(answers)
+            return None
+
+        if (self.repo_answer and len(tokens) <= MAX_LIST_TOKENS
+                and not words.isdisjoint(REPO_WORDS) and not words.isdisjoint(LIST_WORDS)):
+            return "repo_list", self.repo_answer
+        return None
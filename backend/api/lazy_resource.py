@@ -0,0 +1,71 @@
+import threading
+
+class LazyResource:
+    """A heavy resource that is built on first use, exactly once, even under concurrent access."""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self._value = None
+        self._ready = False
+        self._loading = False
+        self._error = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the resource, building it first if needed."""
+        if self._ready:
+            return self._value
+        with self._lock:
+            # Another thread may have finished building it while we waited
+            if not self._ready:
+                self._loading = True
+                try:
+                    self._value = self.factory()
+                    self._ready = True
+                    self._error = None
+                except Exception as e:
+                    # Leave the resource unbuilt so the next caller retries
+                    self._error = str(e)
+                    raise
+                finally:
+                    self._loading = False
+        return self._value
+
+    def reset(self):
+        """Drop the built value so the next caller rebuilds it from fresh inputs."""
+        with self._lock:
+            # Keep the old value in place so concurrent readers never see a half-reset resource
+            self._ready = False
+            self._error = None
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def status(self):
+        """Describe the resource's state for readiness checks."""
+        if self._ready:
+            return 'ready'
+        if self._loading:
+            return 'loading'
+        if self._error:
+            return f'failed: {self._error}'
+        return 'pending'
+
+def warm_up(resources):
+    """Build the given resources in order on a background thread."""
+    def run():
+        for resource in resources:
+            try:
+                # Resources may be passed as callables that return them, or that do the work themselves
+                if callable(resource):
+                    resource = resource()
+                if resource is not None:
+                    resource.get()
+            except Exception as e:
+                print(f"Error warming up resource: {str(e)}")
+
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,355 @@
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import openai
+
+# Lower numbers are served first when callers are queued for a slot
+PRIORITY_STREAMING = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+
+# Errors worth retrying after a backoff
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+    openai.error.Timeout,
+    openai.error.TryAgain
+)
+
+# Errors that mean the provider is over capacity rather than broken
+OVERLOAD_ERRORS = (openai.error.RateLimitError, openai.error.ServiceUnavailableError)
+
+class LLMOverloaded(Exception):
+    """Raised when a model call can't be served in time because the provider is over capacity."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def is_retryable(error):
+    """Check if a model error is transient."""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    # Server-side failures are usually transient too
+    return isinstance(error, openai.error.APIError) and (error.http_status or 0) >= 500
+
+def retry_after_seconds(error):
+    """Read the provider's Retry-After hint from an error, if it sent one."""
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Rate limiter that refills continuously up to a burst capacity."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 10.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost=1):
+        """Take tokens from the bucket, returning how long to wait before they can be used."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # The balance may go negative; later callers then wait for the refill
+            self.tokens -= cost
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, cost=1):
+        """Give back tokens from a reservation that won't be used."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + cost)
+
+class LLMScheduler:
+    """Schedules outbound model calls with a concurrency cap, rate limits, retries and coalescing."""
+
+    def __init__(self, max_concurrency=8, requests_per_minute=3500, tokens_per_minute=0,
+                 max_retries=4, base_delay=0.5, max_delay=8.0, queue_timeout=30.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        # Callers waiting for a slot, as a heap of (priority, arrival) tickets
+        self._counter = itertools.count()
+        self._active = 0
+        self._waiting = []
+        self._condition = threading.Condition()
+        self._async_active = 0
+        self._async_waiting = []
+        self._async_condition = None
+
+        # In-flight calls by key, so identical prompts share one model call
+        self._inflight = {}
+        self._async_inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        self.stats_lock = threading.Lock()
+        self.counters = {'calls': 0, 'retries': 0, 'coalesced': 0, 'overloaded': 0}
+
+    def _count(self, counter, amount=1):
+        with self.stats_lock:
+            self.counters[counter] += amount
+
+    def stats(self):
+        """Return call counters and the current queue depth."""
+        with self.stats_lock:
+            return {
+                **self.counters,
+                'active': self._active + self._async_active,
+                'queued': len(self._waiting) + len(self._async_waiting)
+            }
+
+    def _rate_limit_delay(self, cost):
+        """Reserve rate-limit capacity for a call, returning how long to wait first.
+
+        Raises LLMOverloaded instead, and gives the capacity back, if the wait
+        would be longer than the queue timeout.
+        """
+        reserved = [(bucket, amount) for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, cost)) if bucket]
+        delay = max((bucket.reserve(amount) for bucket, amount in reserved), default=0.0)
+        if delay > self.queue_timeout:
+            for bucket, amount in reserved:
+                bucket.refund(amount)
+            self._count('overloaded')
+            raise LLMOverloaded('Rate limit reached for the language model', delay)
+        return delay
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential backoff, never shorter than the provider's Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after_seconds(error) or 0.0)
+
+    def _give_up(self, error):
+        """Turn the last error into the exception callers see once retries are exhausted."""
+        if isinstance(error, OVERLOAD_ERRORS):
+            self._count('overloaded')
+            return LLMOverloaded('The language model is over capacity', retry_after_seconds(error) or self.max_delay)
+        return error
+
+    # Synchronous API
+
+    def _acquire(self, priority):
+        ticket = (priority, next(self._counter))
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            while self._waiting[0] != ticket or self._active >= self.max_concurrency:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                    self._count('overloaded')
+                    raise LLMOverloaded('Timed out waiting for a language model slot', self.max_delay)
+                self._condition.wait(remaining)
+            heapq.heappop(self._waiting)
+            self._active += 1
+            # The next caller in line may be able to start too
+            self._condition.notify_all()
+
+    def _release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def call(self, fn, key=None, priority=PRIORITY_INTERACTIVE, cost=1):
+        """Run fn() under the scheduler; concurrent calls with the same key share one result."""
+        if key is None:
+            return self._run(fn, priority, cost)
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+        if not leader:
+            self._count('coalesced')
+            return future.result()
+
+        try:
+            result = self._run(fn, priority, cost)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _run(self, fn, priority, cost):
+        for attempt in range(self.max_retries + 1):
+            # Wait for rate-limit capacity before taking a slot, so a call that
+            # could start now isn't stuck behind one waiting on the bucket
+            time.sleep(self._rate_limit_delay(cost))
+            self._acquire(priority)
+            try:
+                self._count('calls')
+                return fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                self._release()
+            # Back off without holding a slot so other callers can proceed
+            if attempt < self.max_retries:
+                self._count('retries')
+                time.sleep(self._backoff(attempt, error))
+        raise self._give_up(error)
+
+    def stream(self, fn, priority=PRIORITY_STREAMING, cost=1):
+        """Yield from the iterator fn() returns, retrying only if it fails before the first chunk."""
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._rate_limit_delay(cost))
+            self._acquire(priority)
+            started = False
+            try:
+                self._count('calls')
+                for chunk in fn():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                self._release()
+            if attempt < self.max_retries:
+                self._count('retries')
+                time.sleep(self._backoff(attempt, error))
+        raise self._give_up(error)
+
+    # Asynchronous API
+
+    async def _aacquire(self, priority):
+        if self._async_condition is None:
+            self._async_condition = asyncio.Condition()
+        ticket = (priority, next(self._counter))
+        deadline = time.monotonic() + self.queue_timeout
+        async with self._async_condition:
+            heapq.heappush(self._async_waiting, ticket)
+            while self._async_waiting[0] != ticket or self._async_active >= self.max_concurrency:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    await asyncio.wait_for(self._async_condition.wait(), remaining)
+                except asyncio.TimeoutError:
+                    self._async_waiting.remove(ticket)
+                    heapq.heapify(self._async_waiting)
+                    self._async_condition.notify_all()
+                    self._count('overloaded')
+                    raise LLMOverloaded('Timed out waiting for a language model slot', self.max_delay)
+            heapq.heappop(self._async_waiting)
+            self._async_active += 1
+            self._async_condition.notify_all()
+
+    async def _arelease(self):
+        async with self._async_condition:
+            self._async_active -= 1
+            self._async_condition.notify_all()
+
+    async def acall(self, fn, key=None, priority=PRIORITY_INTERACTIVE, cost=1):
+        """Await fn() under the scheduler; concurrent calls with the same key share one result."""
+        if key is None:
+            return await self._arun(fn, priority, cost)
+
+        while True:
+            future = self._async_inflight.get(key)
+            if future is None:
+                break
+            self._count('coalesced')
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled rather than this caller, so run the call again
+                if not future.cancelled():
+                    raise
+
+        future = self._async_inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._arun(fn, priority, cost)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if self._async_inflight.get(key) is future:
+                del self._async_inflight[key]
+
+    async def _arun(self, fn, priority, cost):
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._rate_limit_delay(cost))
+            await self._aacquire(priority)
+            try:
+                self._count('calls')
+                return await fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                await self._arelease()
+            if attempt < self.max_retries:
+                self._count('retries')
+                await asyncio.sleep(self._backoff(attempt, error))
+        raise self._give_up(error)
+
+    async def astream(self, fn, priority=PRIORITY_STREAMING, cost=1):
+        """Async version of stream for async iterators."""
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._rate_limit_delay(cost))
+            await self._aacquire(priority)
+            started = False
+            try:
+                self._count('calls')
+                async for chunk in fn():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                await self._arelease()
+            if attempt < self.max_retries:
+                self._count('retries')
+                await asyncio.sleep(self._backoff(attempt, error))
+        raise self._give_up(error)
+
+def create_llm_scheduler():
+    """Build the scheduler configured by the environment."""
+    return LLMScheduler(
+        max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+        requests_per_minute=int(os.getenv('LLM_REQUESTS_PER_MINUTE', 3500)),
+        tokens_per_minute=int(os.getenv('LLM_TOKENS_PER_MINUTE', 0)),
+        max_retries=int(os.getenv('LLM_MAX_RETRIES', 4)),
+        queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT', 30))
+    )
@@ -0,0 +1,293 @@
+import json
+import os
+import random
+import re
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from sqlite_connections import ThreadConnections
+
+# One address, with no whitespace that could start another header line
+ADDRESS_PATTERN = re.compile(r'[^@\s<>,;]+@[^@\s<>,;]+\.[^@\s<>,;]+')
+
+def spool_path():
+    """Return the configured spool file, or None to send mail during the request."""
+    return os.getenv('MAIL_SPOOL_PATH') or None
+
+def is_valid_address(address):
+    """Check that a string is a single email address that is safe to put in a header."""
+    return isinstance(address, str) and ADDRESS_PATTERN.fullmatch(address) is not None
+
+def build_email(message, default_sender=None):
+    """Turn a queued message dict into an EmailMessage."""
+    email = EmailMessage()
+    email['Subject'] = message['subject']
+    email['From'] = message.get('sender') or default_sender
+    email['To'] = ', '.join(message['recipients'])
+    if message.get('reply_to'):
+        email['Reply-To'] = message['reply_to']
+    email.set_content(message['body'])
+    return email
+
+class MailSpool:
+    """Durable outbox in SQLite, so queued messages survive restarts."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connections = ThreadConnections(path)
+        with self._connect() as connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                failed INTEGER NOT NULL DEFAULT 0
+            )''')
+            connection.execute('CREATE INDEX IF NOT EXISTS outbox_due ON outbox (failed, next_attempt_at)')
+
+    def _connect(self):
+        return self._connections.get()
+
+    def add(self, message):
+        """Store a message for delivery, returning its id."""
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute(
+                'INSERT INTO outbox (message, next_attempt_at) VALUES (?, ?)', (json.dumps(message), time.time())
+            )
+        return cursor.lastrowid
+
+    def claim(self, limit, lease=300):
+        """Claim up to limit due (id, message, attempts) rows, oldest first.
+        
+        Claimed rows are hidden from other processes sharing the spool for the
+        lease, so each message is sent once; if this process dies mid-send they
+        become due again when the lease runs out.
+        """
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            # Take the write lock before reading so two dispatchers can't claim the same rows
+            connection.execute('BEGIN IMMEDIATE')
+            rows = connection.execute(
+                'SELECT id, message, attempts FROM outbox WHERE failed = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?',
+                (now, limit)
+            ).fetchall()
+            connection.executemany(
+                'UPDATE outbox SET next_attempt_at = ? WHERE id = ?', [(now + lease, row[0]) for row in rows]
+            )
+        return [(message_id, json.loads(message), attempts) for message_id, message, attempts in rows]
+
+    def next_due_in(self):
+        """Seconds until the next pending message is due, or None if the outbox is empty."""
+        row = self._connect().execute('SELECT MIN(next_attempt_at) FROM outbox WHERE failed = 0').fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def delete(self, message_ids):
+        connection = self._connect()
+        with connection:
+            connection.executemany('DELETE FROM outbox WHERE id = ?', [(message_id,) for message_id in message_ids])
+
+    def retry_later(self, message_id, delay, error):
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                'UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?',
+                (time.time() + delay, error, message_id)
+            )
+
+    def mark_failed(self, message_id, error):
+        """Keep a message that ran out of attempts for inspection, but stop retrying it."""
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                'UPDATE outbox SET attempts = attempts + 1, failed = 1, last_error = ? WHERE id = ?',
+                (error, message_id)
+            )
+
+    def counts(self):
+        """Return the number of pending and failed messages."""
+        pending, failed = self._connect().execute(
+            'SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed = 1), 0) FROM outbox'
+        ).fetchone()
+        return {'pending': pending, 'failed': failed}
+
+class SMTPTransport:
+    """Sends mail over one SMTP connection that is kept open between batches.
+
+    Sends are serialized, since without a spool request threads share the connection.
+    """
+
+    def __init__(self, host, port=587, username=None, password=None, use_tls=True, default_sender=None,
+                 timeout=30, idle_timeout=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.default_sender = default_sender or username
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._connection = None
+        self._last_used = 0
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def _get_connection(self):
+        """Reuse the open connection unless the server has likely dropped it."""
+        if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def send(self, message):
+        email = build_email(message, self.default_sender)
+        with self._lock:
+            try:
+                self._get_connection().send_message(email)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError):
+                # Drop the broken connection so the retry opens a fresh one
+                self._connection = None
+                raise
+            self._last_used = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.quit()
+                except Exception:
+                    pass
+                self._connection = None
+
+class SinkTransport:
+    """Keeps sent messages in memory instead of delivering them, for tests and local development."""
+
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.sent.append(message)
+
+    def close(self):
+        pass
+
+class MailDispatcher:
+    """Delivers spooled mail on a background thread in batches, with retries and backoff."""
+
+    def __init__(self, spool, transport, batch_size=20, max_attempts=6, base_delay=5.0, max_delay=900.0):
+        self.spool = spool
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def enqueue(self, message):
+        """Spool a message and wake the worker, returning the message id.
+
+        Without a spool the message is sent right away and None is returned.
+        """
+        if self.spool is None:
+            self.transport.send(message)
+            return None
+        message_id = self.spool.add(message)
+        self._wake.set()
+        return message_id
+
+    def start(self):
+        if self._thread is None and self.spool is not None:
+            self._thread = threading.Thread(target=self._run, name='mail-dispatcher', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=10):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                sent = self.dispatch()
+            except Exception as e:
+                print(f"Error dispatching mail: {str(e)}")
+                self._stopped.wait(self.base_delay)
+                continue
+            if sent:
+                # There may be more due right away
+                continue
+            # Sleep until woken by a new message or until the next retry is due
+            next_due = self.spool.next_due_in()
+            if next_due is None or next_due > 0:
+                self.transport.close()
+                self._wake.wait(next_due)
+            self._wake.clear()
+
+    def dispatch(self):
+        """Send one batch of due messages, returning how many were delivered."""
+        batch = self.spool.claim(self.batch_size)
+        delivered = []
+        for message_id, message, attempts in batch:
+            try:
+                self.transport.send(message)
+                delivered.append(message_id)
+            except Exception as e:
+                error = f'{type(e).__name__}: {str(e)}'
+                if attempts + 1 >= self.max_attempts:
+                    print(f"Giving up on mail {message_id} after {attempts + 1} attempts: {error}")
+                    self.spool.mark_failed(message_id, error)
+                else:
+                    # Full-jitter exponential backoff
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempts))
+                    self.spool.retry_later(message_id, delay, error)
+        if delivered:
+            self.spool.delete(delivered)
+        return len(delivered)
+
+def create_mail_dispatcher(config):
+    """Build and start the dispatcher configured by the environment and the app's MAIL_* settings."""
+    if os.getenv('MAIL_BACKEND', 'smtp').lower() == 'sink':
+        transport = SinkTransport()
+    else:
+        transport = SMTPTransport(
+            config['MAIL_SERVER'],
+            config['MAIL_PORT'],
+            config['MAIL_USERNAME'],
+            config['MAIL_PASSWORD'],
+            config['MAIL_USE_TLS'],
+            config['MAIL_DEFAULT_SENDER']
+        )
+    # Without a configured spool, contact emails are sent during the request as before
+    spool = None
+    if spool_path():
+        try:
+            spool = MailSpool(spool_path())
+        except Exception as e:
+            print(f"Error opening mail spool, sending mail directly: {str(e)}")
+    dispatcher = MailDispatcher(
+        spool,
+        transport,
+        batch_size=int(os.getenv('MAIL_BATCH_SIZE', 20)),
+        max_attempts=int(os.getenv('MAIL_MAX_ATTEMPTS', 6))
+    )
+    dispatcher.start()
+    return dispatcher
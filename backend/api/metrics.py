@@ -0,0 +1,172 @@
+import contextvars
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from cache hits up to slow model calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# The trace id of the request being handled, shared by threads and asyncio tasks serving it
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+def set_trace_id(trace_id=None):
+    """Set the current request's trace id, generating one if none is given, and return it."""
+    trace_id = (trace_id or new_trace_id())[:64]
+    _trace_id.set(trace_id)
+    return trace_id
+
+def current_trace_id():
+    return _trace_id.get()
+
+def log_error(message):
+    """Print an error, tagged with the current trace id when there is one."""
+    trace_id = current_trace_id()
+    print(f"[trace {trace_id}] {message}" if trace_id else message)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+class Histogram:
+    """Observations counted into cumulative buckets, optionally split by labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block takes, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append((f'{self.name}_bucket', key + (('le', _format_value(bound)),), cumulative))
+                samples.append((f'{self.name}_count', key, cumulative))
+                samples.append((f'{self.name}_sum', key, total))
+        return samples
+
+class Collected:
+    """Values read from elsewhere at scrape time, e.g. cache or scheduler counters."""
+
+    def __init__(self, name, documentation, collect, kind='gauge'):
+        # collect() returns a list of (labels dict, value) pairs
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self):
+        return [(self.name, tuple(sorted(labels.items())), value) for labels, value in self.collect()]
+
+class MetricsRegistry:
+    """The set of metrics exposed on /api/metrics."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation):
+        return self.register(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, buckets))
+
+    def collected(self, name, documentation, collect, kind='gauge'):
+        return self.register(Collected(name, documentation, collect, kind))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # One broken collector shouldn't take down the whole scrape
+                log_error(f"Error collecting metric {metric.name}: {str(e)}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Chat pipeline metrics, recorded by ChatHandler
+CHAT_STAGE_SECONDS = REGISTRY.histogram(
+    'chat_stage_seconds', 'Time spent in each stage of answering a chat message'
+)
+CHAT_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    'chat_first_token_seconds', 'Time from receiving a streamed chat message to sending its first token'
+)
+CHAT_REPLIES = REGISTRY.counter('chat_replies_total', 'Chat replies by how they were produced')
+CHAT_ERRORS = REGISTRY.counter('chat_errors_total', 'Chat requests that failed, by error type')
+PROMPT_TOKENS = REGISTRY.counter('chat_prompt_tokens_total', 'Prompt tokens sent to the language model')
+COMPLETION_TOKENS = REGISTRY.counter('chat_completion_tokens_total', 'Completion tokens received from the language model')
+
+# HTTP metrics, recorded by the Flask and ASGI apps
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time to handle an HTTP request, by route and status'
+)
@@ -0,0 +1,116 @@
+import re
+
+import PyPDF2
+
+from retrieval import is_section_heading
+
+# Kinds of block emitted by iter_blocks
+HEADING = 'heading'
+BULLET = 'bullet'
+DATE_RANGE = 'date_range'
+BODY = 'body'
+
+# Bumped when parsing changes so cached blocks are rebuilt
+BLOCKS_VERSION = 2
+
+# Word and other editors export bullets in Symbol or Wingdings fonts, which
+# PDF text extraction returns as private-use code points (U+F0B7 is the
+# Symbol bullet), often with no space before the text
+SYMBOL_BULLETS = '\uf0a7\uf0a8\uf0b7\uf076\uf0d8\uf0e0\uf0fc'
+BULLET_PATTERN = re.compile(rf'^\s*(?:(?:[•▪◦●‣∙·*\-–]|\d{{1,2}}[.)])\s+|[{SYMBOL_BULLETS}]\s*)')
+# Several bullets extracted onto one line; only unambiguous glyphs start a new one mid-line
+INLINE_BULLET_PATTERN = re.compile(rf'\s(?=[•▪◦●‣]\s|[{SYMBOL_BULLETS}])')
+MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+DATE = rf'(?:{MONTH}\s+)?(?:19|20)\d{{2}}'
+DATE_RANGE_PATTERN = re.compile(rf'\b{DATE}\s*(?:-|–|—|to)\s*(?:{DATE}|present|current|now)\b', re.IGNORECASE)
+
+# Entry lines such as "Company: Role | Aug 2021 - Jul 2023" are short; long lines are prose that mentions dates
+MAX_DATE_LINE_LENGTH = 150
+
+def iter_pages(source):
+    """Yield (page number, text) for each page of a PDF path or binary file, one page at a time."""
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            yield from iter_pages(file)
+        return
+    source.seek(0)
+    reader = PyPDF2.PdfReader(source)
+    for number, page in enumerate(reader.pages, start=1):
+        yield number, page.extract_text() or ''
+
+def classify_line(line):
+    """Return the block type of a single line of resume text."""
+    if is_section_heading(line):
+        return HEADING
+    if BULLET_PATTERN.match(line):
+        return BULLET
+    if len(line) <= MAX_DATE_LINE_LENGTH and DATE_RANGE_PATTERN.search(line):
+        return DATE_RANGE
+    return BODY
+
+def iter_blocks(pages):
+    """Turn (page number, text) pairs into typed blocks with their page and character offset.
+
+    Wrapped lines are folded into the bullet or paragraph they continue, so each
+    block is one logical item. Blocks are yielded as soon as they are complete.
+    """
+    for page_number, text in pages:
+        block = None
+        for line_offset, line in _split_lines(text):
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            kind = classify_line(stripped)
+            if kind == BODY and block is not None and block['type'] in (BODY, BULLET):
+                block['lines'].append(stripped)
+                continue
+
+            if block is not None:
+                yield _finish(block)
+            if kind == BULLET:
+                stripped = BULLET_PATTERN.sub('', stripped, count=1)
+            block = {'type': kind, 'page': page_number, 'offset': line_offset, 'lines': [stripped]}
+
+        # Blocks never span pages so offsets stay page-relative
+        if block is not None:
+            yield _finish(block)
+
+def _split_lines(text):
+    """Yield (offset, line) for each line of a page, splitting lines that hold several bullets."""
+    offset = 0
+    for line in text.split('\n'):
+        start = 0
+        for match in INLINE_BULLET_PATTERN.finditer(line):
+            yield offset + start, line[start:match.start()]
+            start = match.end()
+        yield offset + start, line[start:]
+        offset += len(line) + 1
+
+def _finish(block):
+    lines = block.pop('lines')
+    text = ' '.join(lines)
+    if block['type'] == HEADING:
+        text = text.rstrip(':').strip()
+    elif block['type'] == DATE_RANGE:
+        match = DATE_RANGE_PATTERN.search(text)
+        block['dates'] = match.group(0)
+    block['text'] = text
+    return block
+
+def sections_from_blocks(blocks):
+    """Group blocks into (heading, body) sections, matching retrieval.split_sections."""
+    sections = []
+    heading = 'Header'
+    lines = []
+    for block in blocks:
+        if block['type'] == HEADING:
+            if lines:
+                sections.append((heading, '\n'.join(lines)))
+            heading = block['text'].title()
+            lines = []
+        else:
+            lines.append(block['text'])
+    if lines:
+        sections.append((heading, '\n'.join(lines)))
+    return sections
@@ -0,0 +1,51 @@
+import hashlib
+
+from history_manager import count_tokens
+
+# Bump when the instructions change so cached responses written under the old prompt aren't reused
+PROMPT_VERSION = 1
+
+INSTRUCTIONS = """You are {name}, and you are having a conversation with someone who wants to interview you.
+You should respond as if you are {name}, using first-person perspective. The parts of your resume and GitHub projects most relevant to each question are provided with it.
+
+IMPORTANT INSTRUCTIONS:
+1. Always speak in first person ("I", "my", "me"). Say things like "I have experience in..." or "My skills include..." rather than "The candidate has experience in..."
+2. Be direct and personal
+3. Share your experiences and opinions
+4. Be professional but friendly, and keep a conversational tone
+5. If asked about skills or technologies not explicitly mentioned in your resume:
+   - Make reasonable inferences based on your existing experience
+   - Connect related technologies to what you do know
+   - Be confident but honest about your knowledge
+   - If you truly don't know something, say so directly
+6. Build upon previous responses to maintain a coherent narrative
+7. Never say things like "What would you like to know about me?" - instead, be proactive in sharing your experiences
+8. When discussing your GitHub projects, be specific about what you built and the technologies used
+9. When discussing skills, always mention relevant projects from your GitHub repositories"""
+
+class PromptPrefix:
+    """The part of the prompt that is identical for every question to one candidate.
+
+    It holds the instructions and a short profile of the candidate, and goes first
+    in the prompt so that providers can cache it across requests. Everything that
+    changes per question comes after it.
+    """
+
+    def __init__(self, name, skills=None, repos=()):
+        parts = [INSTRUCTIONS.format(name=name)]
+
+        profile = []
+        resume_skills = sorted(skill for skill, details in (skills or {}).items() if details["source"] in ("resume", "both"))
+        if resume_skills:
+            profile.append(f"- Skills on your resume: {', '.join(resume_skills)}")
+        if repos:
+            # Sorted by name so the text only changes when the repositories do
+            projects = [f"{repo['name']} ({repo['language'] or 'various languages'})" for repo in sorted(repos, key=lambda repo: repo['name'])]
+            profile.append(f"- Your GitHub projects: {', '.join(projects)}")
+        if profile:
+            parts.append("ABOUT YOU:\n" + "\n".join(profile))
+
+        self.text = "\n\n".join(parts)
+        self.tokens = count_tokens(self.text)
+        # Identifies this exact prefix, e.g. in response cache keys
+        self.version = f"{PROMPT_VERSION}-{hashlib.sha1(self.text.encode('utf-8')).hexdigest()[:12]}"
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_connections import ThreadConnections
+
+WORD_PATTERN = re.compile(r"[a-z0-9+#.]+")
+
+def normalize_question(text):
+    """Lowercase a question and strip punctuation and extra whitespace."""
+    return ' '.join(word.rstrip('.') for word in WORD_PATTERN.findall(text.lower()))
+
+def stable_hash(text, size=8):
+    """Hash text to a hex digest that is the same across processes."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=size).hexdigest()
+
+# Words that don't change what a question asks. Negations, question words and
+# anything else, including terms this list has never seen, count as content
+STOPWORDS = frozenset("""
+    a an the and or but if then of to in on at for with from by about as into onto over under
+    is are was were be been being am do does did doing have has had having
+    i me my mine you your yours we us our it its this that these those there here
+    can could would should will shall may might must please ever any some
+    just really also too very much so such
+""".split())
+
+def content_words(question):
+    """Return the words of a normalized question that carry its meaning, sorted and deduplicated."""
+    return ' '.join(sorted(set(question.split()) - STOPWORDS))
+
+class MemoryCacheBackend:
+    """In-process cache backend with LRU and TTL eviction."""
+
+    def __init__(self, max_entries=1000, ttl_seconds=86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        # Map of context hash to the keys cached under it, for near-duplicate lookups
+        self._contexts = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['created_at'] > self.ttl_seconds:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._contexts.setdefault(entry['context'], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def candidates(self, context):
+        """Return (key, content words) for every entry cached under a context."""
+        with self._lock:
+            keys = self._contexts.get(context, ())
+            return [(key, self._entries[key].get('content')) for key in keys]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        keys = self._contexts.get(entry['context'])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._contexts[entry['context']]
+
+class SQLiteCacheBackend:
+    """Cache backend in a SQLite file, shared by every process on the machine."""
+
+    def __init__(self, path, max_entries=1000, ttl_seconds=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._connections = ThreadConnections(path)
+        with self._connect() as connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                context TEXT NOT NULL,
+                entry TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )''')
+            connection.execute('CREATE INDEX IF NOT EXISTS response_cache_context ON response_cache (context)')
+
+    def _connect(self):
+        return self._connections.get()
+
+    def get(self, key):
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT entry, created_at FROM response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with connection:
+            if time.time() - row[1] > self.ttl_seconds:
+                connection.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                return None
+            connection.execute('UPDATE response_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key, entry):
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)',
+                (key, entry['context'], json.dumps(entry), entry['created_at'], now)
+            )
+            # Evict the least recently used entries beyond the size limit
+            connection.execute(
+                '''DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )''',
+                (self.max_entries,)
+            )
+
+    def candidates(self, context):
+        rows = self._connect().execute(
+            'SELECT key, entry FROM response_cache WHERE context = ? AND created_at > ?',
+            (context, time.time() - self.ttl_seconds)
+        ).fetchall()
+        return [(key, json.loads(entry).get('content')) for key, entry in rows]
+
+class RedisCacheBackend:
+    """Cache backend on any Redis-compatible server; Redis handles TTL expiry."""
+
+    def __init__(self, url, max_entries=1000, ttl_seconds=86400, prefix='response_cache'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(f'{self.prefix}:entry:{key}')
+        if value is None:
+            return None
+        self.client.zadd(f'{self.prefix}:lru', {key: time.time()})
+        return json.loads(value)
+
+    def set(self, key, entry):
+        pipe = self.client.pipeline()
+        pipe.set(f'{self.prefix}:entry:{key}', json.dumps(entry), ex=self.ttl_seconds)
+        pipe.sadd(f'{self.prefix}:context:{entry["context"]}', key)
+        pipe.expire(f'{self.prefix}:context:{entry["context"]}', self.ttl_seconds)
+        pipe.zadd(f'{self.prefix}:lru', {key: time.time()})
+        pipe.execute()
+
+        # Evict the least recently used entries beyond the size limit
+        overflow = self.client.zcard(f'{self.prefix}:lru') - self.max_entries
+        if overflow > 0:
+            stale = self.client.zrange(f'{self.prefix}:lru', 0, overflow - 1)
+            pipe = self.client.pipeline()
+            for stale_key in stale:
+                pipe.delete(f'{self.prefix}:entry:{stale_key.decode()}')
+            pipe.zrem(f'{self.prefix}:lru', *stale)
+            pipe.execute()
+
+    def candidates(self, context):
+        keys = [key.decode() for key in self.client.smembers(f'{self.prefix}:context:{context}')]
+        if not keys:
+            return []
+        values = self.client.mget([f'{self.prefix}:entry:{key}' for key in keys])
+        return [(key, json.loads(value).get('content')) for key, value in zip(keys, values) if value is not None]
+
+class ResponseCache:
+    """Cache of chat responses keyed by normalized question and prompt context, with near-duplicate matching.
+
+    A near-duplicate is a question with exactly the same content words, e.g. one
+    that only adds "please" or changes "do you" to "have you". A question that
+    differs by any other word, or by a negation, is a miss.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _keys(self, question, context):
+        normalized = normalize_question(question)
+        context_hash = stable_hash(context, 16)
+        return normalized, context_hash, f'{context_hash}:{stable_hash(normalized, 16)}'
+
+    def get(self, question, context):
+        """Return the cached response for a question asked with the given context, or None."""
+        normalized, context_hash, key = self._keys(question, context)
+
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._count('hits')
+            return entry['response']
+
+        # Fall back to a question with the same content words asked with the same context
+        content = content_words(normalized)
+        if content:
+            for candidate_key, candidate_content in self.backend.candidates(context_hash):
+                if candidate_content != content:
+                    continue
+                entry = self.backend.get(candidate_key)
+                if entry is not None:
+                    self._count('near_hits')
+                    return entry['response']
+
+        self._count('misses')
+        return None
+
+    def set(self, question, context, response):
+        """Cache the response to a question asked with the given context."""
+        normalized, context_hash, key = self._keys(question, context)
+        self.backend.set(key, {
+            'context': context_hash,
+            'question': normalized,
+            'content': content_words(normalized),
+            'response': response,
+            'created_at': time.time()
+        })
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        """Return hit and miss counters."""
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0
+        }
+
+def create_response_cache():
+    """Build the response cache configured by the environment, or None if it is disabled."""
+    backend_name = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower()
+    max_entries = int(os.getenv('RESPONSE_CACHE_SIZE', 1000))
+    ttl_seconds = int(os.getenv('RESPONSE_CACHE_TTL', 86400))
+
+    if backend_name in ('off', 'none', ''):
+        return None
+    if backend_name == 'sqlite':
+        path = os.getenv('RESPONSE_CACHE_PATH', 'response_cache.sqlite3')
+        backend = SQLiteCacheBackend(path, max_entries, ttl_seconds)
+    elif backend_name == 'redis':
+        backend = RedisCacheBackend(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), max_entries, ttl_seconds)
+    else:
+        backend = MemoryCacheBackend(max_entries, ttl_seconds)
+    return ResponseCache(backend)
@@ -1,20 +1,53 @@
-import PyPDF2
 import os
+from artifact_cache import ArtifactCache
+from pdf_extraction import BLOCKS_VERSION, iter_blocks, iter_pages, sections_from_blocks
 
 class ResumeParser:
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, use_cache=True, file_name=None, store=None):
+        # pdf_path may also be a binary file object, e.g. an uploaded PDF
         self.pdf_path = pdf_path
-        self.resume_text = self._extract_text()
+        self.file_name = file_name or os.path.basename(getattr(pdf_path, 'name', None) or str(pdf_path))
         
+        # Parsed artifacts are cached on disk, or in the shared store if given, keyed by the PDF's content hash
+        self.cache = self._open_cache(store) if use_cache and isinstance(pdf_path, str) else None
+        
+        self.resume_text = self.cache.get('text') if self.cache else None
+        self.blocks = self.cache.get('blocks', {'version': BLOCKS_VERSION}) if self.cache else None
+        if self.resume_text is None or self.blocks is None:
+            self.resume_text, self.blocks = self._extract()
+            # Don't cache a failed extraction
+            if self.cache and self.resume_text:
+                self.cache.set('text', self.resume_text)
+                self.cache.set('blocks', self.blocks, {'version': BLOCKS_VERSION})
+        
+        self.sections = sections_from_blocks(self.blocks)
+    
+    def _open_cache(self, store=None):
+        """Open the artifact cache for the PDF, or None if the PDF can't be read."""
+        try:
+            return ArtifactCache(self.pdf_path, store=store)
+        except Exception as e:
+            print(f"Error opening artifact cache: {str(e)}")
+            return None
+        
+    def _extract(self):
+        """Extract the text and typed blocks from the PDF in a single pass over its pages."""
+        pages = []
+        def read_pages():
+            for page_number, text in iter_pages(self.pdf_path):
+                pages.append(text)
+                yield page_number, text
+        try:
+            blocks = list(iter_blocks(read_pages()))
+            return ''.join(pages), blocks
+        except Exception as e:
+            print(f"Error reading PDF: {str(e)}")
+            return '', []
+    
     def _extract_text(self):
         """Extract text from the PDF file."""
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ''
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
+            return ''.join(text for _, text in iter_pages(self.pdf_path))
         except Exception as e:
             print(f"Error reading PDF: {str(e)}")
             return ''
@@ -23,5 +56,5 @@ class ResumeParser:
         """Return structured information about the resume."""
         return {
             'raw_text': self.resume_text,
-            'file_name': os.path.basename(self.pdf_path)
-        } 
\ No newline at end of file
+            'file_name': self.file_name
+        } 
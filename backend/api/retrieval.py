@@ -0,0 +1,146 @@
+import re
+import numpy as np
+
+# Common resume headings used to split the text into sections
+SECTION_HEADINGS = (
+    'summary', 'professional summary', 'objective', 'profile',
+    'experience', 'professional experience', 'work experience', 'employment history',
+    'other experience', 'additional experience', 'volunteer experience',
+    'education', 'skills', 'technical skills', 'projects', 'academic projects',
+    'certifications', 'publications', 'awards', 'achievements', 'leadership', 'interests'
+)
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'do', 'does', 'did', 'for', 'from',
+    'have', 'has', 'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'the',
+    'to', 'was', 'we', 'what', 'when', 'where', 'which', 'who', 'with', 'you', 'your'
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+def tokenize(text):
+    """Split text into lowercase terms, keeping names like c++, c# and node.js intact."""
+    terms = []
+    for term in TOKEN_PATTERN.findall(text.lower()):
+        term = term.rstrip('.')
+        if term and term not in STOP_WORDS:
+            terms.append(term)
+    return terms
+
+def is_section_heading(line):
+    """Check if a line looks like a resume section heading."""
+    stripped = line.strip().rstrip(':')
+    if not stripped or len(stripped) > 40:
+        return False
+    if stripped.lower() in SECTION_HEADINGS:
+        return True
+    # Short all-caps lines such as "EXPERIENCE" or "TECHNICAL SKILLS"
+    return stripped.isupper() and len(stripped.split()) <= 4
+
+def split_sections(text):
+    """Split resume text into (heading, body) sections."""
+    sections = []
+    heading = 'Header'
+    lines = []
+    for line in text.split('\n'):
+        if is_section_heading(line):
+            if any(l.strip() for l in lines):
+                sections.append((heading, '\n'.join(lines).strip()))
+            heading = line.strip().rstrip(':').title()
+            lines = []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((heading, '\n'.join(lines).strip()))
+    return sections
+
+class ResumeIndex:
+    """BM25 index over resume sections and GitHub repository descriptions."""
+
+    def __init__(self, max_chunk_words=120, k1=1.5, b=0.75):
+        self.max_chunk_words = max_chunk_words
+        self.k1 = k1
+        self.b = b
+
+        # Each chunk is a dict with source, title and text
+        self.chunks = []
+        self._dirty = True
+
+    def add_document(self, text, source='resume'):
+        """Chunk a document by section, splitting long sections into smaller pieces."""
+        self.add_sections(split_sections(text), source)
+
+    def add_sections(self, sections, source='resume'):
+        """Chunk already split (heading, body) sections."""
+        for heading, body in sections:
+            words = body.split()
+            for start in range(0, len(words), self.max_chunk_words):
+                self.chunks.append({
+                    'source': source,
+                    'title': heading,
+                    'text': ' '.join(words[start:start + self.max_chunk_words])
+                })
+        self._dirty = True
+
+    def add_repos(self, repos, source='github'):
+        """Add one chunk per GitHub repository."""
+        for repo in repos:
+            details = f"{repo['name']}: {repo['description'] or 'No description'}"
+            if repo.get('language'):
+                details += f" (written in {repo['language']})"
+            if repo.get('topics'):
+                details += f". Topics: {', '.join(repo['topics'])}"
+            self.chunks.append({'source': source, 'title': f"GitHub project {repo['name']}", 'text': details})
+        self._dirty = True
+
+    def build(self):
+        """Build the term-frequency matrix and BM25 statistics."""
+        documents = [tokenize(chunk['title'] + ' ' + chunk['text']) for chunk in self.chunks]
+
+        self.vocabulary = {}
+        for terms in documents:
+            for term in terms:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        self.term_frequencies = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, terms in enumerate(documents):
+            for term in terms:
+                self.term_frequencies[row, self.vocabulary[term]] += 1
+
+        lengths = self.term_frequencies.sum(axis=1)
+        average_length = lengths.mean() if len(documents) else 0.0
+        document_frequency = (self.term_frequencies > 0).sum(axis=0)
+        self.idf = np.log(1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        # Precompute the length normalization part of the BM25 denominator
+        if average_length:
+            self.length_norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        else:
+            self.length_norm = np.zeros(len(documents), dtype=np.float32)
+        self._dirty = False
+        return self
+
+    def search(self, query, k=4):
+        """Return the k chunks most relevant to the query, in document order."""
+        if self._dirty:
+            self.build()
+        if not self.chunks:
+            return []
+
+        columns = [self.vocabulary[term] for term in set(tokenize(query)) if term in self.vocabulary]
+        if columns:
+            tf = self.term_frequencies[:, columns]
+            scores = (self.idf[columns] * tf * (self.k1 + 1) / (tf + self.length_norm[:, None])).sum(axis=1)
+        else:
+            scores = np.zeros(len(self.chunks))
+
+        if not scores.any():
+            # Nothing matched, so fall back to the top of the resume
+            return self.chunks[:k]
+
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [self.chunks[i] for i in sorted(top) if scores[i] > 0]
+
+    def format_context(self, query, k=4):
+        """Render the most relevant chunks for the prompt."""
+        return '\n\n'.join(f"[{chunk['title']}]\n{chunk['text']}" for chunk in self.search(query, k))
@@ -0,0 +1,97 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# How often expired sessions are deleted from the shared store
+PURGE_INTERVAL = 60
+
+class SessionStore:
+    """Bounded per-session state with LRU and idle-timeout eviction.
+
+    With a shared store, e.g. SQLiteStateStore, states are saved to it after each
+    change and reloaded when another worker process has changed them since, so a
+    visitor keeps their conversation whichever worker answers. States must then
+    provide to_dict() and restore(data), and callers sync a state while holding
+    whatever lock guards its changes.
+    """
+
+    def __init__(self, factory, max_sessions=1000, ttl_seconds=3600, store=None, namespace='sessions'):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.namespace = namespace
+
+        # Map of session id to (last access time, state), oldest first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Version of each session's state in the shared store, as last seen by this process
+        self._versions = {}
+        self._next_purge = 0
+
+    @staticmethod
+    def new_session_id():
+        """Generate a fresh, unguessable session id."""
+        return uuid.uuid4().hex
+
+    def get(self, session_id):
+        """Return the state for a session, creating it if it does not exist."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+
+            entry = self._sessions.pop(session_id, None)
+            state = entry[1] if entry else self.factory()
+            self._sessions[session_id] = (now, state)
+
+            # Drop the least recently used sessions once we are over capacity
+            while len(self._sessions) > self.max_sessions:
+                self._versions.pop(self._sessions.popitem(last=False)[0], None)
+        return state
+
+    def save(self, session_id, state):
+        """Write a session's state to the shared store, if there is one, and wait for the commit."""
+        if self.store is None or session_id is None:
+            return
+        version = self.store.set(self.namespace, session_id, state.to_dict(), wait=True)
+        if version is not None:
+            self._versions[session_id] = version
+
+    def sync(self, session_id, state):
+        """Reload a session's state if another process saved a newer one."""
+        if self.store is None or session_id is None:
+            return
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + PURGE_INTERVAL
+            self.store.purge(self.namespace, now - self.ttl_seconds)
+        version, data = self.store.get_with_version(self.namespace, session_id, max_age=self.ttl_seconds)
+        if version is not None and version != self._versions.get(session_id):
+            state.restore(data)
+            self._versions[session_id] = version
+
+    def discard(self, session_id):
+        """Forget a session's state."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._versions.pop(session_id, None)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict_expired(self, now):
+        """Drop sessions that have been idle for longer than the TTL."""
+        # Entries are kept in access order, so expired ones are always at the front
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self._versions.pop(session_id, None)
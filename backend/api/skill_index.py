@@ -0,0 +1,119 @@
+import re
+from collections import deque
+
+# Bump when matching rules change so cached artifacts derived with the old rules are rebuilt
+SKILL_INDEX_VERSION = 2
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+# Common shorthand for skills, mapped to their canonical names
+DEFAULT_ALIASES = {
+    "k8s": "Kubernetes",
+    "kube": "Kubernetes",
+    "js": "JavaScript",
+    "ecmascript": "JavaScript",
+    "ts": "TypeScript",
+    "py": "Python",
+    "python3": "Python",
+    "golang": "Go",
+    "postgres": "PostgreSQL",
+    "psql": "PostgreSQL",
+    "mongo": "MongoDB",
+    "mssql": "SQL Server",
+    "reactjs": "React",
+    "react.js": "React",
+    "angularjs": "Angular",
+    "vue": "Vue.js",
+    "vuejs": "Vue.js",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "expressjs": "Express",
+    "sklearn": "Scikit-learn",
+    "scikit learn": "Scikit-learn",
+    "tf": "TensorFlow",
+    "ml": "Machine Learning",
+    "gcp": "Google Cloud",
+    "amazon web services": "AWS",
+    "ci cd": "CI/CD",
+    "cicd": "CI/CD"
+}
+
+def tokenize(text):
+    """Split text into lowercase tokens, keeping names like c++, c# and node.js intact."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def transitive_closure(graph, roots, decay=0.6, min_score=0.1):
+    """Infer skills reachable from the roots, scoring each by decay ** hops.
+
+    Returns a map of inferred skill to (score, the skill it was directly inferred from).
+    """
+    inferred = {}
+    for root in roots:
+        queue = deque([(root, 1.0)])
+        best = {root: 1.0}
+        while queue:
+            skill, score = queue.popleft()
+            next_score = score * decay
+            if next_score < min_score:
+                continue
+            for related in graph.get(skill, ()):
+                # Breadth-first, so the first visit is the shortest and strongest path
+                if related in best:
+                    continue
+                best[related] = next_score
+                queue.append((related, next_score))
+                if related not in roots and inferred.get(related, (0, None))[0] < next_score:
+                    inferred[related] = (next_score, skill)
+    return inferred
+
+class MessageAnalysis:
+    """A message tokenized once, with its n-grams ready for lookups."""
+
+    def __init__(self, text, max_ngram):
+        self.tokens = tokenize(text)
+        self.ngrams = set()
+        for n in range(1, max_ngram + 1):
+            for start in range(len(self.tokens) - n + 1):
+                self.ngrams.add(' '.join(self.tokens[start:start + n]))
+
+    def mentions_any(self, phrases):
+        """Check if the message contains any of the given normalized phrases."""
+        return not self.ngrams.isdisjoint(phrases)
+
+class SkillIndex:
+    """Lookup tables from normalized skill names, aliases and repo names to canonical entries."""
+
+    def __init__(self, skills, repo_names=(), aliases=None):
+        self.phrases = {}
+        self.repos = {}
+        self.max_ngram = 1
+
+        for skill in skills:
+            self._add(self.phrases, skill, skill)
+        for alias, skill in (DEFAULT_ALIASES if aliases is None else aliases).items():
+            # Only keep aliases for skills we actually know about
+            if skill in skills:
+                self._add(self.phrases, alias, skill, overwrite=False)
+        for name in repo_names:
+            # Repo names like "resume-chatbot" are matched as "resume chatbot" too
+            self._add(self.repos, name, name)
+            self._add(self.repos, re.sub(r'[-_]+', ' ', name), name)
+
+    def _add(self, table, phrase, value, overwrite=True):
+        key = ' '.join(tokenize(phrase))
+        if not key or (not overwrite and key in table):
+            return
+        table[key] = value
+        self.max_ngram = max(self.max_ngram, key.count(' ') + 1)
+
+    def analyze(self, text):
+        """Tokenize a message once for all later lookups."""
+        return MessageAnalysis(text, self.max_ngram)
+
+    def find_skills(self, analysis):
+        """Return the canonical skills mentioned in an analyzed message, in a stable order."""
+        return sorted({self.phrases[ngram] for ngram in analysis.ngrams if ngram in self.phrases})
+
+    def find_repos(self, analysis):
+        """Return the repository names mentioned in an analyzed message."""
+        return sorted({self.repos[ngram] for ngram in analysis.ngrams if ngram in self.repos})
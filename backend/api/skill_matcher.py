@@ -0,0 +1,71 @@
+import re
+
+# Common technical skills
+TECHNICAL_SKILLS = [
+    'python', 'java', 'c++', 'javascript', 'typescript', 'react', 'angular', 'vue', 'node.js', 'express',
+    'django', 'flask', 'spring', 'ruby', 'php', 'swift', 'kotlin',
+    'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sqlite',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'ansible', 'jenkins', 'git', 'github', 'gitlab',
+    'machine learning', 'deep learning', 'nlp', 'computer vision', 'data science', 'ai', 'artificial intelligence',
+    'html', 'css', 'sass', 'less', 'bootstrap', 'tailwind', 'material-ui', 'jquery',
+    'rest', 'graphql', 'api', 'microservices', 'soa', 'websocket', 'grpc',
+    'linux', 'unix', 'windows', 'macos', 'ios', 'android',
+    'agile', 'scrum', 'kanban', 'devops', 'ci/cd', 'tdd', 'bdd'
+]
+
+# Common soft skills
+SOFT_SKILLS = [
+    'communication', 'teamwork', 'leadership', 'problem-solving', 'critical thinking', 'time management',
+    'adaptability', 'creativity', 'collaboration', 'negotiation', 'presentation', 'public speaking',
+    'mentoring', 'coaching', 'project management'
+]
+
+# spaCy components that noun-based extraction doesn't need
+UNUSED_SPACY_COMPONENTS = ['parser', 'ner', 'lemmatizer']
+
+PRONOUNS = frozenset(['i', 'me', 'my', 'we', 'our'])
+
+class SkillMatcher:
+    """Matches a fixed skill vocabulary in a single pass over the text."""
+
+    def __init__(self, vocabulary):
+        # Longest terms first so "github" wins over "git" and "node.js" over "node"
+        terms = sorted({term.lower() for term in vocabulary}, key=len, reverse=True)
+        alternation = '|'.join(re.escape(term) for term in terms)
+
+        # Lookarounds instead of \b so terms ending in symbols, like c++, still match
+        self.pattern = re.compile(rf'(?<!\w)(?:{alternation})(?!\w)', re.IGNORECASE)
+
+    def match(self, text):
+        """Return the set of vocabulary skills found in the text."""
+        return {match.group().lower().capitalize() for match in self.pattern.finditer(text)}
+
+default_matcher = SkillMatcher(TECHNICAL_SKILLS + SOFT_SKILLS)
+
+def extract_noun_skills(doc):
+    """Return nouns and proper nouns from a spaCy doc that are likely skills."""
+    skills = set()
+    for token in doc:
+        if token.pos_ in ('NOUN', 'PROPN') and len(token.text) > 2 and not token.is_stop:
+            if token.text.lower() not in PRONOUNS:
+                skills.add(token.text.capitalize())
+    return skills
+
+def extract_skills_from_text(text, nlp=None, matcher=default_matcher):
+    """Extract skills from text using the compiled matcher and, if given, a spaCy pipeline.
+
+    Passing no pipeline is the fast mode: only vocabulary skills are returned.
+    """
+    skills = matcher.match(text)
+    if nlp is not None:
+        skills |= extract_noun_skills(nlp(text))
+    return sorted(skills)
+
+def extract_skills_from_texts(texts, nlp=None, matcher=default_matcher, batch_size=64, n_process=1):
+    """Extract skills from many texts, streaming them through spaCy in batches."""
+    results = [matcher.match(text) for text in texts]
+    if nlp is not None:
+        docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+        for skills, doc in zip(results, docs):
+            skills |= extract_noun_skills(doc)
+    return [sorted(skills) for skills in results]
@@ -0,0 +1,26 @@
+import os
+import sqlite3
+import threading
+
+class ThreadConnections:
+    """sqlite3 connections to one database file, one per thread and process.
+
+    sqlite3 connections can't be shared across threads, and one inherited
+    through a fork, e.g. by workers under gunicorn --preload, must not be
+    reused, so each thread of each process opens its own on first use.
+    """
+
+    def __init__(self, path, timeout=5, pragmas=()):
+        self.path = path
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._local = threading.local()
+
+    def get(self):
+        connection, pid = getattr(self._local, 'connection', (None, None))
+        if connection is None or pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            for pragma in self.pragmas:
+                connection.execute(f'PRAGMA {pragma}')
+            self._local.connection = (connection, os.getpid())
+        return connection
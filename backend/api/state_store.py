@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_connections import ThreadConnections
+
+class SQLiteStateStore:
+    """JSON values keyed by (namespace, key), shared by every worker process on the machine.
+
+    The database runs in WAL mode so readers in other processes never wait for a
+    writer. Writes are queued and committed by a background thread, one
+    transaction per batch, so concurrent writers share a commit. Recently read
+    values are kept in memory and revalidated with a version lookup instead of
+    reading and decoding them again.
+    """
+
+    def __init__(self, path, cache_size=512, batch_size=100):
+        self.path = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        # With WAL, NORMAL only gives up durability of the last commits on power loss, not consistency
+        self._connections = ThreadConnections(path, pragmas=('synchronous=NORMAL',))
+
+        connection = self._connect()
+        # WAL is a property of the database file, so setting it once covers every process
+        connection.execute('PRAGMA journal_mode=WAL')
+        with connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID''')
+            connection.execute('CREATE INDEX IF NOT EXISTS state_updated ON state (namespace, updated_at)')
+
+        # Read-through cache of (namespace, key) to (version, value), least recently used first
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Writes waiting for the flusher, in the order they were made
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._flushed = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+
+        self.reads = 0
+        self.cache_hits = 0
+        self.writes = 0
+        self.batches = 0
+
+        self._thread = None
+        with self._condition:
+            self._ensure_flusher()
+
+    def _connect(self):
+        return self._connections.get()
+
+    def _ensure_flusher(self):
+        """Start the flusher thread unless it is running. Call with the condition held."""
+        # A forked worker, e.g. under gunicorn --preload, doesn't inherit the parent's thread
+        if not self._stopped and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='state-store-flusher', daemon=True)
+            self._thread.start()
+
+    def get(self, namespace, key, max_age=None, validate=True):
+        """Return a stored value, or None if it is missing or older than max_age seconds."""
+        return self.get_with_version(namespace, key, max_age, validate)[1]
+
+    def get_with_version(self, namespace, key, max_age=None, validate=True):
+        """Return (version, value) of a stored value, or (None, None) if there is none.
+
+        Pass validate=False for values that never change once written, to skip
+        the version lookup when they are cached.
+        """
+        cache_key = (namespace, key)
+        with self._condition:
+            pending = self._pending.get(cache_key)
+        if pending is not None:
+            # Not committed yet, so it has no version other processes would know
+            return -1, pending[0]
+
+        self.reads += 1
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+        if cached is not None and not validate:
+            self.cache_hits += 1
+            return cached
+
+        min_updated_at = time.time() - max_age if max_age is not None else 0
+        connection = self._connect()
+        if cached is not None:
+            row = connection.execute(
+                'SELECT version FROM state WHERE namespace = ? AND key = ? AND updated_at >= ?',
+                (namespace, key, min_updated_at)
+            ).fetchone()
+            if row is not None and row[0] == cached[0]:
+                self.cache_hits += 1
+                with self._cache_lock:
+                    if cache_key in self._cache:
+                        self._cache.move_to_end(cache_key)
+                return cached
+
+        row = connection.execute(
+            'SELECT version, value FROM state WHERE namespace = ? AND key = ? AND updated_at >= ?',
+            (namespace, key, min_updated_at)
+        ).fetchone()
+        if row is None:
+            with self._cache_lock:
+                self._cache.pop(cache_key, None)
+            return None, None
+        entry = (row[0], json.loads(row[1]))
+        self._remember(cache_key, entry)
+        return entry
+
+    def set(self, namespace, key, value, wait=False, timeout=5.0):
+        """Queue a value to be stored, waiting up to timeout seconds for its commit if wait is true.
+
+        Returns the stored version once committed, or None if not waiting. If the
+        flusher doesn't commit the value in time, it is written by the caller.
+        """
+        cache_key = (namespace, key)
+        text = json.dumps(value)
+        with self._condition:
+            self._sequence += 1
+            sequence = self._sequence
+            # Re-queue at the end so pending writes stay in sequence order
+            self._pending.pop(cache_key, None)
+            self._pending[cache_key] = (value, text, sequence)
+            self._ensure_flusher()
+            self._condition.notify_all()
+            if not wait:
+                return None
+            deadline = time.monotonic() + timeout
+            while self._flushed < sequence and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            # Take the write back unless the flusher has already picked it up
+            pending = self._pending.get(cache_key)
+            write_here = pending is not None and pending[2] == sequence and self._flushed < sequence
+            if write_here:
+                del self._pending[cache_key]
+        if write_here:
+            version = self._write([(cache_key, (value, text, sequence))])[0]
+            if version is not None:
+                self._remember(cache_key, (version, value))
+            return version
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+        return cached[0] if cached is not None else None
+
+    def purge(self, namespace, older_than):
+        """Delete a namespace's values last written before the given time."""
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM state WHERE namespace = ? AND updated_at < ?', (namespace, older_than))
+
+    def flush(self):
+        """Wait until every write queued so far is committed."""
+        with self._condition:
+            target = self._sequence
+            self._ensure_flusher()
+            while self._flushed < target and not self._stopped:
+                self._condition.wait()
+
+    def close(self):
+        """Commit outstanding writes and stop the flusher."""
+        self.flush()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        return {
+            'reads': self.reads,
+            'cache_hits': self.cache_hits,
+            'writes': self.writes,
+            'batches': self.batches
+        }
+
+    def _remember(self, cache_key, entry):
+        with self._cache_lock:
+            self._cache[cache_key] = entry
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped and not self._pending:
+                    return
+                # Everything queued while the previous batch was committing goes in this one
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popitem(last=False))
+
+            versions = self._write(batch)
+            for (cache_key, (value, _, _)), version in zip(batch, versions):
+                if version is not None:
+                    self._remember(cache_key, (version, value))
+
+            with self._condition:
+                # Writes still queued, including newer ones for keys in this batch, aren't done yet
+                oldest_pending = min((item[2] for item in self._pending.values()), default=self._sequence + 1)
+                self._flushed = max(self._flushed, oldest_pending - 1)
+                self._condition.notify_all()
+
+    def _write(self, batch):
+        """Commit a batch in one transaction, returning the new version of each value."""
+        connection = self._connect()
+        now = time.time()
+        versions = []
+        try:
+            with connection:
+                for (namespace, key), (_, text, _) in batch:
+                    connection.execute(
+                        '''INSERT INTO state (namespace, key, value, version, updated_at) VALUES (?, ?, ?, 1, ?)
+                        ON CONFLICT (namespace, key) DO UPDATE SET
+                            value = excluded.value, version = state.version + 1, updated_at = excluded.updated_at''',
+                        (namespace, key, text, now)
+                    )
+                    versions.append(connection.execute(
+                        'SELECT version FROM state WHERE namespace = ? AND key = ?', (namespace, key)
+                    ).fetchone()[0])
+            self.writes += len(batch)
+            self.batches += 1
+            return versions
+        except Exception as e:
+            # The values are still in each worker's memory, so losing a batch only costs sharing them
+            print(f"Error writing state store batch: {str(e)}")
+            return [None] * len(batch)
+
+def create_state_store():
+    """Build the shared store configured by the environment, or None to keep state in each process."""
+    if os.getenv('STATE_STORE', 'memory').lower() != 'sqlite':
+        return None
+    try:
+        return SQLiteStateStore(
+            os.getenv('STATE_STORE_PATH', 'state.sqlite3'),
+            cache_size=int(os.getenv('STATE_STORE_CACHE_SIZE', 512))
+        )
+    except Exception as e:
+        # e.g. a read-only filesystem; every worker then keeps its own state in memory
+        print(f"Error opening state store, keeping state in memory: {str(e)}")
+        return None
@@ -24,9 +24,12 @@ function App() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  // Stays true until the whole reply has streamed in, after the spinner is gone
+  const [isStreaming, setIsStreaming] = useState(false);
   const [skills, setSkills] = useState({ explicit: [], inferred: [] });
   const [showSkills, setShowSkills] = useState(false);
   const messagesEndRef = useRef(null);
+  const sessionIdRef = useRef(null);
   const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:5000';
 
   useEffect(() => {
@@ -63,19 +66,62 @@ function App() {
   }, [messages]);
 
   const handleSend = async () => {
-    if (!input.trim()) return;
+    if (!input.trim() || isStreaming) return;
 
     const userMessage = input.trim();
     setInput('');
     setMessages(prev => [...prev, { text: userMessage, sender: 'user' }]);
     setIsLoading(true);
+    setIsStreaming(true);
 
     try {
-      const response = await axios.post(`${BACKEND_URL}/api/chat`, {
-        message: userMessage
+      const response = await fetch(`${BACKEND_URL}/api/chat/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ message: userMessage, session_id: sessionIdRef.current })
       });
-      
-      setMessages(prev => [...prev, { text: response.data.response, sender: 'bot' }]);
+      if (!response.ok) throw new Error(`Request failed with status ${response.status}`);
+
+      // Add an empty bot message and fill it in as tokens arrive
+      setMessages(prev => [...prev, { text: '', sender: 'bot' }]);
+      const appendToReply = (text) => {
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+        });
+      };
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        // Hide the spinner once tokens arrive, but keep the input disabled until the stream ends
+        setIsLoading(false);
+        buffer += decoder.decode(value, { stream: true });
+
+        // Server-Sent Events are separated by a blank line
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          let event = 'message';
+          let data = '';
+          for (const line of raw.split('\n')) {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          if (!data) continue;
+          const payload = JSON.parse(data);
+          if (event === 'session' || event === 'done') {
+            sessionIdRef.current = payload.session_id;
+          } else if (event === 'error') {
+            appendToReply(payload.error);
+          } else {
+            appendToReply(payload.token);
+          }
+        }
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       setMessages(prev => [...prev, { 
@@ -85,6 +131,7 @@ function App() {
     }
 
     setIsLoading(false);
+    setIsStreaming(false);
   };
 
   const handleKeyPress = (e) => {
@@ -180,13 +227,13 @@ function App() {
               value={input}
               onChange={(e) => setInput(e.target.value)}
               onKeyPress={handleKeyPress}
-              disabled={isLoading}
+              disabled={isLoading || isStreaming}
             />
             <Button
               variant="contained"
               color="primary"
               onClick={handleSend}
-              disabled={isLoading}
+              disabled={isLoading || isStreaming}
               endIcon={<SendIcon />}
             >
               Send